@@ -0,0 +1,111 @@
+import json
+import platform
+from datetime import datetime, timezone
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from apps.rep_app.models import ChatMessage, ChatSession
+from apps.rep_app.utils.conversation_memory import load_recent_messages
+
+from .bench_dashboard import current_commit, summarize, time_call
+
+BATCH_SIZE = 5_000
+
+
+class Command(BaseCommand):
+    help = (
+        "Grow one user's chat history step by step and time the history queries "
+        "(session list, session messages, memory window, saving a turn) at each size."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sessions',
+            type=int,
+            nargs='*',
+            default=[100, 1000, 5000],
+            help="Session counts to measure at, e.g. 100 1000 5000 (default).",
+        )
+        parser.add_argument('--messages', type=int, default=20, help="Messages per session (default 20).")
+        parser.add_argument('--iterations', type=int, default=20, help="Samples per measurement (default 20).")
+        parser.add_argument('--output', default=None, help="Append results to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        # Runs in a test copy of the default DB, so real chats are untouched
+        setup_test_environment()
+        db_creation = connections['default'].creation
+        old_name = db_creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            user = User.objects.create_user('bench')
+            # Other users' history must not slow this user's queries down either
+            other = User.objects.create_user('bench-other')
+            client = Client()
+            client.force_login(user)
+            for size in sorted(options['sessions']):
+                self.grow_history(user, size, options['messages'])
+                self.grow_history(other, size, options['messages'])
+                self.emit(self.run_suite(client, user, options), options['output'])
+        finally:
+            db_creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def grow_history(self, user, sessions, messages_per_session):
+        missing = sessions - ChatSession.objects.filter(user=user).count()
+        # Sessions per batch, so that each batch inserts about BATCH_SIZE messages
+        step = max(1, BATCH_SIZE // max(messages_per_session, 1))
+        for start in range(0, missing, step):
+            count = min(step, missing - start)
+            created = ChatSession.objects.bulk_create(
+                [ChatSession(user=user, summary=f"Session {start + n}") for n in range(count)]
+            )
+            ChatMessage.objects.bulk_create([
+                ChatMessage(session=session, is_user=n % 2 == 0, content=f"Message {n} of session {session.id}")
+                for session in created
+                for n in range(messages_per_session)
+            ])
+
+    def run_suite(self, client, user, options):
+        iterations = options['iterations']
+        latest = ChatSession.objects.filter(user=user).order_by('-created_at').first()
+        session_list = ChatSession.objects.filter(user=user).order_by('-created_at')[:10]
+
+        def request(path):
+            response = client.get(path)
+            assert response.status_code == 200, response.status_code
+
+        timings = {
+            'session_list_query': summarize(time_call(lambda: list(session_list.all()), iterations)),
+            'chatbot_page': summarize(time_call(lambda: request('/chatbot/'), iterations)),
+            'session_messages_request': summarize(
+                time_call(lambda: request(f'/chat/session-messages/{latest.id}/'), iterations)
+            ),
+            'memory_window_query': summarize(
+                time_call(lambda: load_recent_messages(latest, "next question"), iterations)
+            ),
+            'save_turn': summarize(
+                time_call(lambda: latest.save_turn("benchmark question", "benchmark answer"), iterations)
+            ),
+        }
+        return {
+            'benchmark': 'chat_history',
+            'commit': current_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'database': connections['default'].vendor,
+            'sessions_per_user': ChatSession.objects.filter(user=user).count(),
+            'messages_total': ChatMessage.objects.count(),
+            'session_list_plan': session_list.explain(),
+            'timings': timings,
+        }
+
+    def emit(self, result, output):
+        line = json.dumps(result, ensure_ascii=False)
+        if output:
+            with open(output, 'a', encoding='utf-8') as fh:
+                fh.write(line + '\n')
+        else:
+            self.stdout.write(line)
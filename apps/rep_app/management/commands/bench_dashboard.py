@@ -0,0 +1,173 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from apps.rep_app import views
+from apps.rep_app.utils.region_stats import refresh_region_stats
+from apps.rep_app.utils.synthetic_data import generate_synthetic_listings
+
+
+def time_call(func, iterations):
+    """Run func `iterations` times and return the wall-clock samples in ms."""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'runs': len(ordered),
+        'min_ms': round(ordered[0], 3),
+        'median_ms': round(statistics.median(ordered), 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        'max_ms': round(ordered[-1], 3),
+    }
+
+
+def current_commit():
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True, text=True, cwd=settings.BASE_DIR, check=True,
+        )
+        return result.stdout.strip()
+    except Exception:
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the dashboard data path, the /dashboard/ page and its "
+        "/dashboard/data/ endpoint, and print one JSON line per dataset size."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='*',
+            default=[],
+            help="Reseed with this many synthetic listings before each run, e.g. 10000 1000000 10000000.",
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help="Required with --sizes: allows wiping the analytics tables.",
+        )
+        parser.add_argument('--iterations', type=int, default=5, help="Samples per measurement (default 5).")
+        parser.add_argument('--region', default=None, help="Region for the filtered path (default: first region).")
+        parser.add_argument('--output', default=None, help="Append results to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        if options['sizes'] and not options['reset']:
+            raise CommandError("--sizes wipes metrics_vals; pass --reset to confirm.")
+
+        # The request benchmark logs in a throwaway user in a test copy of the default DB
+        setup_test_environment()
+        db_creation = connections['default'].creation
+        old_name = db_creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            client = Client()
+            client.force_login(User.objects.create_user('bench'))
+            for size in options['sizes'] or [None]:
+                result = self.run_suite(client, size, options)
+                self.emit(result, options['output'])
+        finally:
+            db_creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def run_suite(self, client, size, options):
+        iterations = options['iterations']
+        timings = {}
+
+        connection = views.get_database_connection()
+        if not connection:
+            raise CommandError("Could not connect to the analytics database.")
+        try:
+            if size:
+                generate_synthetic_listings(connection, size, reset=True)
+                timings['refresh_region_stats_full'] = summarize(
+                    time_call(lambda: refresh_region_stats(connection, full=True), 1)
+                )
+            else:
+                # The dashboard reads region_stats as is
+                refresh_region_stats(connection)
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) FROM listings")
+                listing_count = cursor.fetchone()[0]
+                cursor.execute("SELECT COALESCE(MAX(id), 0) FROM metrics_vals")
+                metric_rows = cursor.fetchone()[0]
+        finally:
+            connection.close()
+
+        data = views.get_dashboard_data()
+        if data is None:
+            raise CommandError("Dashboard data is unavailable; check the analytics database.")
+        region = options['region'] or next(iter(data['available_regions']), None)
+
+        timings['get_dashboard_data'] = summarize(time_call(views.get_dashboard_data, iterations))
+        if region:
+            timings['get_dashboard_data_region'] = summarize(
+                time_call(lambda: views.get_dashboard_data(region), iterations)
+            )
+
+        def request(path, cold=False, **headers):
+            if cold:
+                cache.clear()
+            response = client.get(path, **headers)
+            assert response.status_code in (200, 304), response.status_code
+            return response
+
+        timings['dashboard_request_cold'] = summarize(
+            time_call(lambda: request('/dashboard/', cold=True), iterations)
+        )
+        request('/dashboard/')
+        timings['dashboard_request_warm'] = summarize(
+            time_call(lambda: request('/dashboard/'), iterations)
+        )
+        timings['dashboard_data_request_cold'] = summarize(
+            time_call(lambda: request('/dashboard/data/', cold=True), iterations)
+        )
+        etag = request('/dashboard/data/')['ETag']
+        timings['dashboard_data_request_warm'] = summarize(
+            time_call(lambda: request('/dashboard/data/'), iterations)
+        )
+        timings['dashboard_data_request_not_modified'] = summarize(
+            time_call(lambda: request('/dashboard/data/', HTTP_IF_NONE_MATCH=etag), iterations)
+        )
+        payload_bytes = len(request('/dashboard/data/').content)
+
+        return {
+            'benchmark': 'dashboard',
+            'commit': current_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'listings': listing_count,
+            'metric_rows': metric_rows,
+            'region': region,
+            'payload_bytes': payload_bytes,
+            'timings': timings,
+        }
+
+    def emit(self, result, output):
+        line = json.dumps(result, ensure_ascii=False)
+        if output:
+            with open(output, 'a', encoding='utf-8') as fh:
+                fh.write(line + '\n')
+        else:
+            self.stdout.write(line)
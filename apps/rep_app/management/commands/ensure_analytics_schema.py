@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.rep_app.utils.analytics_schema import INDEXES_SQL, ensure_analytics_schema
+from apps.rep_app.views import get_database_connection
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the listings and region_stats tables, add missing columns and build "
+        "their indexes concurrently. Run once after deploying, before refreshing."
+    )
+
+    def handle(self, *args, **options):
+        connection = get_database_connection()
+        if not connection:
+            raise CommandError("Could not connect to the analytics database.")
+        try:
+            ensure_analytics_schema(connection)
+        finally:
+            connection.close()
+        self.stdout.write(self.style.SUCCESS(f"Analytics schema ready ({len(INDEXES_SQL)} indexes checked)."))
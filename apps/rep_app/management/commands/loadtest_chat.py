@@ -0,0 +1,137 @@
+import asyncio
+import json
+import platform
+import time
+from datetime import datetime, timezone
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from apps.rep_app.utils import langchain_bot
+from apps.rep_app.utils.tasks import get_executor
+
+from .bench_dashboard import current_commit, summarize
+
+# Small talk, templated metric questions and questions for the agents
+DEFAULT_QUESTIONS = [
+    "Hello!",
+    "What is the average rent in Praha 7?",
+    "Which region is the cheapest?",
+    "Tell me how flat sizes compare across regions",
+    "Thanks, that helps",
+    "How many listings are there in Brno?",
+]
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))], 3)
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate concurrent chat users (start_session -> chat_api -> session_messages) "
+        "and print throughput and latency percentiles as one JSON line. "
+        "Runs offline with REP_LLM_BACKEND=fake."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help="Concurrent simulated users (default 10).")
+        parser.add_argument('--turns', type=int, default=5, help="Chat messages per user (default 5).")
+        parser.add_argument('--think-time', type=float, default=0.0,
+                            help="Seconds each user waits between messages (default 0).")
+        parser.add_argument('--questions', default=None,
+                            help="File with one question per line (default: a built-in mix).")
+        parser.add_argument('--allow-openai', action='store_true',
+                            help="Allow running against the real OpenAI backend (costs money).")
+        parser.add_argument('--output', default=None, help="Append results to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        if langchain_bot.LLM_BACKEND != "fake" and not options['allow_openai']:
+            raise CommandError("Set REP_LLM_BACKEND=fake to load-test offline, or pass --allow-openai.")
+        questions = DEFAULT_QUESTIONS
+        if options['questions']:
+            with open(options['questions'], encoding='utf-8') as fh:
+                questions = [line.strip() for line in fh if line.strip()]
+
+        # Build the agents (schema reflection) before the clock starts
+        if langchain_bot.get_tool_agent() is None:
+            raise CommandError("Chat agents are not available; check the database and LLM settings.")
+
+        # Runs in a test copy of the default DB, so real chats are untouched
+        setup_test_environment()
+        db_creation = connections['default'].creation
+        old_name = db_creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            users = [User.objects.create_user(f'loadtest-{n}') for n in range(options['users'])]
+            result = asyncio.run(self.run_load(users, questions, options))
+            # Let background summaries finish before the test DB goes away
+            get_executor().shutdown(wait=True)
+        finally:
+            db_creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        self.emit(result, options['output'])
+
+    async def run_load(self, users, questions, options):
+        samples = {'start_session': [], 'chat_api': [], 'session_messages': []}
+        statuses = {}
+
+        async def timed(endpoint, call):
+            start = time.perf_counter()
+            response = await call
+            samples[endpoint].append((time.perf_counter() - start) * 1000)
+            key = f"{endpoint}:{response.status_code}"
+            statuses[key] = statuses.get(key, 0) + 1
+            return response
+
+        async def simulate(n, user):
+            client = AsyncClient()
+            await client.aforce_login(user)
+            response = await timed('start_session', client.post('/chat/start/'))
+            session_id = json.loads(response.content)['session_id']
+            for turn in range(options['turns']):
+                message = questions[(n + turn) % len(questions)]
+                await timed('chat_api', client.post(
+                    '/chat/api/',
+                    json.dumps({'message': message, 'session_id': session_id}),
+                    content_type='application/json',
+                ))
+                if options['think_time']:
+                    await asyncio.sleep(options['think_time'])
+            await timed('session_messages', client.get(f'/chat/session-messages/{session_id}/'))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(simulate(n, user) for n, user in enumerate(users)))
+        elapsed = time.perf_counter() - started
+
+        requests = sum(len(s) for s in samples.values())
+        return {
+            'benchmark': 'loadtest_chat',
+            'commit': current_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'database': await sync_to_async(lambda: connections['default'].vendor)(),
+            'llm_backend': langchain_bot.LLM_BACKEND,
+            'users': len(users),
+            'turns': options['turns'],
+            'elapsed_s': round(elapsed, 3),
+            'requests_per_s': round(requests / elapsed, 2),
+            'chats_per_s': round(len(samples['chat_api']) / elapsed, 2),
+            'statuses': statuses,
+            'timings': {
+                endpoint: {**summarize(values), 'p99_ms': percentile(values, 0.99)}
+                for endpoint, values in samples.items() if values
+            },
+        }
+
+    def emit(self, result, output):
+        line = json.dumps(result, ensure_ascii=False)
+        if output:
+            with open(output, 'a', encoding='utf-8') as fh:
+                fh.write(line + '\n')
+        else:
+            self.stdout.write(line)
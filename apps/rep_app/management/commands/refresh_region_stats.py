@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.rep_app.utils.region_stats import refresh_region_stats
+from apps.rep_app.views import get_database_connection
+
+
+class Command(BaseCommand):
+    help = "Fold new metrics_vals rows into the precomputed region_stats table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help="Rebuild every region instead of only those with new rows.",
+        )
+
+    def handle(self, *args, **options):
+        connection = get_database_connection()
+        if not connection:
+            raise CommandError("Could not connect to the analytics database.")
+        try:
+            refreshed = refresh_region_stats(connection, full=options['full'])
+        finally:
+            connection.close()
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {refreshed} region(s)."))
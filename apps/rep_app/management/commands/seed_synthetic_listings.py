@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.rep_app.utils.synthetic_data import generate_synthetic_listings, table_has_rows
+from apps.rep_app.views import get_database_connection
+
+
+class Command(BaseCommand):
+    help = "Fill geo_location and metrics_vals with synthetic listings for benchmarking."
+
+    def add_arguments(self, parser):
+        parser.add_argument('listings', type=int, help="Number of listings to generate.")
+        parser.add_argument('--regions', type=int, default=22, help="Number of regions (default 22).")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed (default 42).")
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help="Empty metrics_vals, geo_location and the derived tables first.",
+        )
+
+    def handle(self, *args, **options):
+        connection = get_database_connection()
+        if not connection:
+            raise CommandError("Could not connect to the analytics database.")
+        try:
+            with connection.cursor() as cursor:
+                has_rows = table_has_rows(cursor, 'metrics_vals')
+            if has_rows and not options['reset']:
+                raise CommandError(
+                    "metrics_vals already has rows. Only seed a disposable database, "
+                    "and pass --reset to wipe it first."
+                )
+            written = generate_synthetic_listings(
+                connection,
+                options['listings'],
+                regions=options['regions'],
+                reset=options['reset'],
+                seed=options['seed'],
+            )
+        finally:
+            connection.close()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} metrics_vals row(s)."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.rep_app.utils.listings import sync_listings
+from apps.rep_app.views import get_database_connection
+
+
+class Command(BaseCommand):
+    help = "Pivot new metrics_vals rows into the typed listings table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help="Rebuild the whole table (initial backfill) instead of only new rows.",
+        )
+
+    def handle(self, *args, **options):
+        connection = get_database_connection()
+        if not connection:
+            raise CommandError("Could not connect to the analytics database.")
+        try:
+            written, _ = sync_listings(connection, full=options['full'])
+        finally:
+            connection.close()
+        self.stdout.write(self.style.SUCCESS(f"Synced {written} listing(s)."))
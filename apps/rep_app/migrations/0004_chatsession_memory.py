@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rep_app', '0003_cachedanswer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatsession',
+            name='memory_summary',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='chatsession',
+            name='memory_upto_id',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -1,5 +1,6 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.utils import timezone
 # Create your models here.
 
 class Product(models.Model):
@@ -10,9 +11,47 @@ class ChatSession(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     summary = models.TextField(blank=True, null=True)
+    # Rolling summary of the messages older than the memory window (see conversation_memory.py)
+    memory_summary = models.TextField(blank=True, default="")
+    memory_upto_id = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Sidebar: a user's sessions, newest first
+            models.Index(fields=['user', '-created_at'], name='chatsession_user_created_idx'),
+        ]
+
+    def save_turn(self, question, answer):
+        """Store a question and its answer together, in one transaction."""
+        return self.save_turns([(question, answer)])
+
+    def save_turns(self, turns):
+        """Store (question, answer) pairs in the given order, in one transaction."""
+        with transaction.atomic():
+            return ChatMessage.objects.bulk_create([
+                ChatMessage(session=self, is_user=is_user, content=content)
+                for question, answer in turns
+                for is_user, content in ((True, question), (False, answer))
+            ])
 
 class ChatMessage(models.Model):
     session = models.ForeignKey(ChatSession, related_name='messages', on_delete=models.CASCADE)
     is_user = models.BooleanField(default=True)
     content = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    timestamp = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # History and memory window: a session's messages in order
+            models.Index(fields=['session', 'timestamp'], name='chatmessage_session_ts_idx'),
+        ]
+
+class CachedAnswer(models.Model):
+    """Agent answer to a context-free metric question, valid for one data version"""
+    question_hash = models.CharField(max_length=64, unique=True)
+    question = models.TextField()
+    answer = models.TextField()
+    data_version = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+    hits = models.PositiveIntegerField(default=0)
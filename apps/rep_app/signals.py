@@ -0,0 +1,38 @@
+from django.dispatch import Signal, receiver
+
+# Sent by ingestion code once new rows are committed to metrics_vals, e.g.
+#   metrics_vals_written.send(sender=MyScraper)
+metrics_vals_written = Signal()
+
+
+@receiver(metrics_vals_written)
+def refresh_region_stats_on_write(sender, **kwargs):
+    """Fold freshly written metrics into the dashboard statistics"""
+    from .views import get_database_connection
+    from .utils.region_stats import refresh_region_stats
+
+    connection = get_database_connection()
+    if not connection:
+        return
+    try:
+        refresh_region_stats(connection)
+    except Exception as e:
+        print(f"Region stats refresh error: {e}")
+    finally:
+        connection.close()
+
+
+@receiver(metrics_vals_written)
+def invalidate_dashboard_cache_on_write(sender, **kwargs):
+    """Evict dashboard entries built from the previous data version"""
+    from .utils.dashboard_cache import invalidate_dashboard_cache
+
+    invalidate_dashboard_cache()
+
+
+@receiver(metrics_vals_written)
+def clear_answer_cache_on_write(sender, **kwargs):
+    """Cached chat answers describe the previous data; drop them"""
+    from .utils.answer_cache import clear_answer_cache
+
+    clear_answer_cache()
@@ -0,0 +1,86 @@
+// Static Plotly layout for the dashboard charts.
+// The server only sends compact column arrays (see dashboard_data in views.py).
+
+const PLASMA = ['#0d0887', '#46039f', '#7201a8', '#9c179e', '#bd3786', '#d8576b', '#ed7953', '#fb9f3a', '#fdca26', '#f0f921'];
+const INFERNO = ['#000004', '#1b0c41', '#4a0c6b', '#781c6d', '#a52c60', '#cf4446', '#ed6925', '#fb9b06', '#f7d13d', '#fcffa4'];
+
+const DASHBOARD_CHARTS = {
+  rent: { element: 'rent-chart', type: 'bar', label: 'Average Monthly Rent (CZK)', colorscale: 'Viridis', texttemplate: '%{text:,.0f}' },
+  area: { element: 'area-chart', type: 'bar', label: 'Average Area (m²)', colorscale: PLASMA, texttemplate: '%{text:.1f}' },
+  price_per_m2: { element: 'price-per-m2-chart', type: 'bar', label: 'Price per m² (CZK)', colorscale: INFERNO, texttemplate: '%{text:,.0f}' },
+  property_count: { element: 'property-count-chart', type: 'pie' },
+};
+
+function toColorscale(colors) {
+  if (typeof colors === 'string') return colors;
+  return colors.map((color, i) => [i / (colors.length - 1), color]);
+}
+
+function barFigure(spec, series) {
+  return {
+    data: [{
+      type: 'bar',
+      x: series.regions,
+      y: series.values,
+      text: series.values,
+      texttemplate: spec.texttemplate,
+      textposition: 'outside',
+      hovertemplate: `Region=%{x}<br>${spec.label}=%{y}<extra></extra>`,
+      marker: {
+        color: series.values,
+        colorscale: toColorscale(spec.colorscale),
+        showscale: true,
+        colorbar: { title: { text: spec.label } },
+        line: { color: 'white', width: 1 },
+      },
+    }],
+    layout: {
+      height: 350,
+      margin: { l: 60, r: 40, t: 20, b: 80 },
+      showlegend: false,
+      plot_bgcolor: 'rgba(0,0,0,0)',
+      paper_bgcolor: 'rgba(0,0,0,0)',
+      font: { size: 12 },
+      xaxis: { title: { text: 'Region' }, showgrid: false, tickangle: 45, tickfont: { size: 11 } },
+      yaxis: { title: { text: spec.label }, showgrid: true, gridcolor: 'rgba(0,0,0,0.1)', tickfont: { size: 11 } },
+    },
+  };
+}
+
+function pieFigure(series) {
+  return {
+    data: [{
+      type: 'pie',
+      labels: series.regions,
+      values: series.values,
+      hole: 0.4,
+      textposition: 'inside',
+      textinfo: 'percent+label',
+      textfont: { size: 12 },
+      marker: { line: { color: 'white', width: 2 } },
+    }],
+    layout: {
+      height: 350,
+      margin: { l: 20, r: 20, t: 20, b: 20 },
+      showlegend: false,
+      plot_bgcolor: 'rgba(0,0,0,0)',
+      paper_bgcolor: 'rgba(0,0,0,0)',
+      font: { size: 11 },
+    },
+  };
+}
+
+async function renderDashboardCharts(url) {
+  const res = await fetch(url, { headers: { Accept: 'application/json' }, credentials: 'same-origin' });
+  if (!res.ok) {
+    throw new Error(`HTTP ${res.status}`);
+  }
+  const payload = await res.json();
+
+  for (const [name, spec] of Object.entries(DASHBOARD_CHARTS)) {
+    const series = payload.charts[name];
+    if (!series || series.regions.length === 0) continue;
+    const figure = spec.type === 'pie' ? pieFigure(series) : barFigure(spec, series);
+    Plotly.newPlot(spec.element, figure.data, figure.layout);
+  }
+}
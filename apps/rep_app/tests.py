@@ -1,5 +1,27 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
 from django.test import Client
 
+from apps.rep_app.models import ChatMessage, ChatSession
+from apps.rep_app.utils.answer_cache import question_hash
+from apps.rep_app.utils.concurrency import SingleFlight
+from apps.rep_app.utils.conversation_memory import build_context
+from apps.rep_app.utils.fake_llm import FakeChatModel
+from apps.rep_app.utils.intent_router import CHAT, METRICS, route_message
+from apps.rep_app.utils.langchain_bot import sql_agent_prompt
+from apps.rep_app.utils.metrics import chat_trace, incr, metrics_snapshot, stage
+from apps.rep_app.utils.metric_templates import parse_metric_question
+from apps.rep_app.utils.pagination import decode_cursor, encode_cursor
+from apps.rep_app.utils.sql_cache import normalize_sql
+from apps.rep_app.utils.sql_guard import QueryRejected, check_read_only, format_result
+from apps.rep_app.utils.streaming import AgentStreamHandler
+from apps.rep_app.views import build_dashboard_payload
+
 # Create your tests here.
 
 
@@ -7,3 +29,206 @@ def test_landing_page():
     client = Client()
     response = client.get('/')
     assert response.status_code == 200
+
+
+def test_dashboard_payload_skips_regions_without_metric():
+    stats = [
+        {'region_name': 'Praha 7', 'avg_monthly_rent': Decimal('30000'), 'rent_count': 2,
+         'avg_area_m2': Decimal('50'), 'area_count': 2, 'price_per_m2': Decimal('600'),
+         'price_per_m2_count': 2, 'total_properties': 2},
+        {'region_name': 'Brno', 'avg_monthly_rent': None, 'rent_count': 0,
+         'avg_area_m2': Decimal('70.25'), 'area_count': 1, 'price_per_m2': None,
+         'price_per_m2_count': 0, 'total_properties': 0},
+    ]
+    payload = build_dashboard_payload(stats, ['Praha 7'])
+    assert payload['charts']['rent'] == {'regions': ['Praha 7'], 'values': [30000.0]}
+    assert payload['charts']['area'] == {'regions': ['Brno', 'Praha 7'], 'values': [70.25, 50.0]}
+    assert payload['charts']['property_count']['regions'] == ['Praha 7']
+    assert payload['kpis'] == {'total_properties': 2, 'avg_rent': 30000, 'max_rent': 30000, 'min_rent': 30000}
+
+
+def test_stream_handler_only_streams_final_answer():
+    handler = AgentStreamHandler()
+    for token in ["Thought: greet\n", "Final Answer", ": Hel", "lo"]:
+        handler.on_llm_new_token(token, run_id='router')
+    handler.close()
+    assert [event['text'] for event in handler] == ['Hel', 'lo']
+
+
+def test_answer_cache_key_ignores_case_spacing_and_punctuation():
+    assert question_hash("Average rent in Praha 7?") == question_hash("  average RENT in  praha 7 ")
+    assert question_hash("Average rent in Praha 7") != question_hash("Average rent in Praha 8")
+
+
+def test_normalize_sql_keeps_literals():
+    assert normalize_sql("SELECT  AVG(x)\nFROM t WHERE r = 'Praha 7';") == "select avg(x) from t where r = 'Praha 7'"
+    assert normalize_sql("select 1 where r = 'Praha  7'") != normalize_sql("select 1 where r = 'Praha 7'")
+
+
+def test_router_only_decides_clear_cases():
+    assert route_message("Ahoj, jak se máš?") == CHAT
+    assert route_message("What is the average rent in Praha 7?") == METRICS
+    assert route_message("Jaká je průměrná cena nájmu?") == METRICS
+    assert route_message("What should I consider when moving?") is None
+    # Follow-ups and advice questions are left to the routing agent
+    assert route_message("ok, and what about Brno?") is None
+    assert route_message("Thanks!", has_context=True) is None
+    assert route_message("Is it better to rent an apartment in Prague or buy one?") is None
+    assert route_message("Should I rent a flat in Brno?") is None
+
+
+def test_metric_templates_match_czech_region_cases():
+    regions = ['Praha 1', 'Praha 7', 'Brno', 'Plzeň']
+    assert parse_metric_question("Jaký je průměrný nájem v Praze 7?", regions) == {
+        'metric': 'rent', 'aggregate': 'avg', 'region': 'Praha 7', 'ranking': False}
+    assert parse_metric_question("kolik inzerátů je v Plzni", regions)['region'] == 'Plzeň'
+    assert parse_metric_question("which region is the cheapest?", regions)['ranking'] is True
+    assert parse_metric_question("average rent in Paris", regions) is None
+    assert parse_metric_question("compare rent in Praha 7 and Brno", regions) is None
+    assert parse_metric_question("what do most people pay for rent in Brno?", regions)['aggregate'] == 'avg'
+
+
+def test_sql_agent_prompt_carries_schema_without_discovery_step():
+    prompt = sql_agent_prompt("- listings(url text, meta jsonb {}) ")
+    messages = prompt.format_messages(input="Average rent in Brno?", dialect="postgresql",
+                                      top_k=10, agent_scratchpad=[])
+    text = "\n".join(str(m.content) for m in messages)
+    assert "listings(url text, meta jsonb {})" in text
+    assert "I should look at the tables" not in text
+    assert "schema of the most relevant tables" not in text
+
+
+def test_context_keeps_summary_and_newest_messages_within_budget():
+    session = ChatSession(memory_summary="User compares Praha 7 and Brno.")
+    messages = [ChatMessage(is_user=i % 2 == 0, content=f"message {i} " * 10) for i in range(6)]
+    context = build_context(session, messages, "And in Plzeň?", budget=80)
+    lines = context.split("\n")
+    assert lines[0] == "Summary of the earlier conversation: User compares Praha 7 and Brno."
+    assert lines[-1] == "User: And in Plzeň?"
+    assert "message 5" in lines[-2] and "message 0" not in context
+
+
+def test_history_cursor_round_trip():
+    timestamp = datetime(2025, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(timestamp, 42)) == (timestamp, 42)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_single_flight_shares_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def answer():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "42"
+
+    async def ask_three_times():
+        return await asyncio.gather(*(flight.run('question', answer) for _ in range(3)))
+
+    assert asyncio.run(ask_three_times()) == ["42", "42", "42"]
+    assert len(calls) == 1 and flight.coalesced == 2
+
+    async def stream_while_in_flight():
+        # A streaming caller needs its own run to receive step and token events
+        return await asyncio.gather(flight.run('question', answer), flight.run('question', answer, join=False))
+
+    assert asyncio.run(stream_while_in_flight()) == ["42", "42"]
+    assert len(calls) == 3 and flight.coalesced == 2
+
+
+def test_chat_trace_collects_stages_and_counters():
+    with chat_trace('test') as trace:
+        with stage('test.stage', sql="SELECT 1"):
+            incr('test.hits')
+    assert [span['stage'] for span in trace['spans']] == ['test.stage']
+    assert trace['spans'][0]['sql'] == "SELECT 1" and trace['counters'] == {'test.hits': 1}
+    snapshot = metrics_snapshot()
+    assert snapshot['stages']['test.total']['count'] >= 1
+    assert snapshot['counters']['test.hits'] >= 1
+
+
+def test_sql_guard_rejects_writes_and_truncates_results():
+    check_read_only("WITH t AS (SELECT 1) SELECT * FROM t -- delete later")
+    check_read_only("SELECT 'update; drop' FROM listings;")
+    for sql in ("DELETE FROM listings", "SELECT 1; DROP TABLE listings", "SELECT pg_sleep(60)"):
+        with pytest.raises(QueryRejected):
+            check_read_only(sql)
+
+    rows = [(n, 'Praha') for n in range(50)]
+    assert format_result(rows[:3]) == str(rows[:3])
+    truncated = format_result(rows, max_rows=10)
+    assert truncated.startswith(str(rows[:10])) and "showing 10 of 50 rows" in truncated
+
+
+def test_fake_llm_routes_like_the_react_agent():
+    llm = FakeChatModel(latency=0, token_delay=0)
+    prompt = "Answer with Action: and Action Input: lines.\n\nQuestion: What is the average rent in Brno?\nThought:"
+    assert "Action: Real Estate DB" in llm.invoke(prompt).content
+    answered = llm.invoke(prompt + " ...\nObservation: 25 000 CZK\nThought:").content
+    assert answered.endswith("Final Answer: 25 000 CZK")
+    assert llm.invoke("hello").content == "(offline model) You said: hello"
+
+
+def test_fake_llm_streams_tokens_through_invoke():
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class TokenCollector(BaseCallbackHandler):
+        def __init__(self):
+            self.tokens = []
+
+        def on_llm_new_token(self, token, **kwargs):
+            self.tokens.append(token)
+
+    collector = TokenCollector()
+    answer = FakeChatModel(latency=0, token_delay=0).invoke("hello there", config={"callbacks": [collector]})
+    assert "".join(collector.tokens) == answer.content == "(offline model) You said: hello there"
+    assert answer.usage_metadata['output_tokens'] > 0
+
+
+@pytest.mark.django_db
+def test_save_turns_keeps_question_order():
+    from django.contrib.auth.models import User
+
+    session = ChatSession.objects.create(user=User.objects.create_user('batch'))
+    session.save_turns([("q1", "a1"), ("q2", "a2")])
+    session.save_turn("q3", "a3")
+    contents = list(session.messages.order_by('timestamp', 'id').values_list('content', flat=True))
+    assert contents == ["q1", "a1", "q2", "a2", "q3", "a3"]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_batch_questions_do_not_see_batch_answers(monkeypatch):
+    from django.contrib.auth.models import User
+    from django.test import AsyncClient
+
+    from apps.rep_app.utils import langchain_bot
+
+    prompts = {}
+
+    async def run_route(route, prompt, callbacks):
+        await asyncio.sleep(0.01)
+        prompts[prompt.splitlines()[-1]] = prompt
+        return "answer"
+
+    monkeypatch.setattr(langchain_bot, 'answer_metric_question', lambda text: None)
+    monkeypatch.setattr(langchain_bot, 'get_cached_answer', lambda text: None)
+    monkeypatch.setattr(langchain_bot, 'get_tool_agent', lambda: object())
+    monkeypatch.setattr(langchain_bot, '_arun_route', run_route)
+
+    user = User.objects.create_user('batcher')
+    session = ChatSession.objects.create(user=user)
+    questions = [f"question {n}" for n in range(12)]
+
+    async def run_batch():
+        client = AsyncClient()
+        await client.aforce_login(user)
+        response = await client.post('/chat/batch/', json.dumps({'session_id': session.id, 'questions': questions}),
+                                     content_type='application/json')
+        return [json.loads(line) async for line in response.streaming_content]
+
+    assert asyncio.run(run_batch())[-1] == {'type': 'done', 'answered': 12, 'failed': 0}
+    # Context-free prompts are the bare question
+    assert prompts == {question: question for question in questions}
+    assert session.messages.count() == 24
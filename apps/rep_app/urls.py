@@ -17,7 +17,7 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 from django.shortcuts import redirect
-from apps.rep_app.views import landing, signup, login_page, dashboard, chat_api, chatbot_view, start_session, get_session_summary, delete_session, session_messages
+from apps.rep_app.views import landing, signup, login_page, dashboard, dashboard_data, chat_api, chat_stream, chatbot_view, start_session, get_session_summary, delete_session, session_messages, chat_metrics, chat_batch
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib.auth.views import LogoutView
@@ -38,12 +38,16 @@ urlpatterns = [
     path('signup/', signup, name='signup'),
     path('login/', login_page, name='login'),
     path('dashboard/', dashboard, name='dashboard'),
+    path('dashboard/data/', dashboard_data, name='dashboard_data'),
     path('logout/', CustomLogoutView.as_view(), name='logout'),
     path('chat/', redirect_to_chatbot, name='chat_redirect'),
     path('chatbot/', chatbot_view, name='chatbot'),
     path('chat/start/', start_session, name='start_session'),
     path('chat/api/', chat_api, name='chat_api'),
+    path('chat/stream/', chat_stream, name='chat_stream'),
+    path('chat/batch/', chat_batch, name='chat_batch'),
     path('chat/session-summary/<int:session_id>/', get_session_summary, name='get_session_summary'),
     path("chat/delete-session/<int:session_id>/", delete_session, name="delete_session"),
     path('chat/session-messages/<int:session_id>/', session_messages, name='session_messages'),
+    path('chat/metrics/', chat_metrics, name='chat_metrics'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,31 @@
+"""
+One-off setup of the derived analytics tables.
+
+Refreshes and web requests never run DDL. ``ensure_analytics_schema()``,
+run by ``manage.py ensure_analytics_schema`` after deploying, creates the
+``listings`` and ``region_stats`` tables, their watermarks and any missing
+columns in one transaction. It then builds the indexes with ``CREATE INDEX
+CONCURRENTLY``, so ingestion keeps writing to ``metrics_vals`` meanwhile.
+"""
+from .listings import INDEXES_SQL as LISTINGS_INDEXES_SQL, ensure_listings_table
+from .region_stats import INDEXES_SQL as REGION_STATS_INDEXES_SQL, ensure_region_stats_tables
+
+INDEXES_SQL = LISTINGS_INDEXES_SQL + REGION_STATS_INDEXES_SQL
+
+
+def ensure_analytics_schema(connection):
+    """Create missing derived tables, columns and indexes; safe to run again."""
+    with connection.cursor() as cursor:
+        ensure_listings_table(cursor)
+        ensure_region_stats_tables(cursor)
+    connection.commit()
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    dbapi_connection = getattr(connection, 'dbapi_connection', connection)
+    dbapi_connection.autocommit = True
+    try:
+        with connection.cursor() as cursor:
+            for sql in INDEXES_SQL:
+                cursor.execute(sql)
+    finally:
+        dbapi_connection.autocommit = False
@@ -0,0 +1,136 @@
+"""
+Persistent cache of agent answers to repeated metric questions.
+
+Only answers produced without conversation context and with the
+"Real Estate DB" tool are stored, keyed by the normalized question text.
+Each entry remembers the ``listings`` sync watermark it was computed from
+and is ignored (and removed) once a sync changes the data the agents read. Entries expire after
+``REP_ANSWER_CACHE_TTL`` seconds and the least recently used ones are
+evicted beyond ``REP_ANSWER_CACHE_MAX_ENTRIES``.
+"""
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+from datetime import timedelta
+
+from django.utils import timezone
+
+from ..models import CachedAnswer
+from .data_version import fetch_listings_version
+
+# === ENV CONFIG ===
+ANSWER_CACHE_TTL = int(os.getenv("REP_ANSWER_CACHE_TTL", "86400"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("REP_ANSWER_CACHE_MAX_ENTRIES", "1000"))
+
+# Only answers that went through this routing tool are cached
+CACHEABLE_TOOL = "Real Estate DB"
+
+_counters = {'hits': 0, 'misses': 0, 'stores': 0}
+_counters_lock = threading.Lock()
+
+
+def _count(name):
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def normalize_question(question):
+    """Case, whitespace and trailing punctuation do not change the question."""
+    text = unicodedata.normalize("NFKC", question).lower()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip("?!. ")
+
+
+def question_hash(question):
+    return hashlib.sha256(normalize_question(question).encode("utf-8")).hexdigest()
+
+
+def get_cached_answer(question):
+    """Cached answer for the current data version, or None."""
+    try:
+        data_version = fetch_listings_version()
+        if data_version is None:
+            return None
+        entry = CachedAnswer.objects.filter(question_hash=question_hash(question)).first()
+        expired_before = timezone.now() - timedelta(seconds=ANSWER_CACHE_TTL)
+        if entry is None:
+            _count('misses')
+            return None
+        if entry.data_version != data_version or entry.created_at < expired_before:
+            entry.delete()
+            _count('misses')
+            return None
+        CachedAnswer.objects.filter(pk=entry.pk).update(last_used_at=timezone.now(), hits=entry.hits + 1)
+        _count('hits')
+        return entry.answer
+    except Exception as e:
+        print(f"Answer cache read error: {e}")
+        return None
+
+
+def set_cached_answer(question, answer):
+    """Store an answer for the current data version and evict old entries."""
+    try:
+        data_version = fetch_listings_version()
+        if data_version is None:
+            return
+        now = timezone.now()
+        CachedAnswer.objects.update_or_create(
+            question_hash=question_hash(question),
+            defaults={
+                'question': normalize_question(question),
+                'answer': answer,
+                'data_version': data_version,
+                'created_at': now,
+                'last_used_at': now,
+                'hits': 0,
+            },
+        )
+        _count('stores')
+        evict_answers()
+    except Exception as e:
+        print(f"Answer cache write error: {e}")
+
+
+def evict_answers():
+    """Drop expired entries, then the least recently used beyond the size limit."""
+    CachedAnswer.objects.filter(
+        created_at__lt=timezone.now() - timedelta(seconds=ANSWER_CACHE_TTL)
+    ).delete()
+    stale_ids = list(
+        CachedAnswer.objects.order_by('-last_used_at')
+        .values_list('pk', flat=True)[ANSWER_CACHE_MAX_ENTRIES:]
+    )
+    if stale_ids:
+        CachedAnswer.objects.filter(pk__in=stale_ids).delete()
+
+
+def clear_answer_cache():
+    """Remove every cached answer."""
+    CachedAnswer.objects.all().delete()
+
+
+def answer_cache_stats():
+    """Hit/miss/store counters of this process plus the number of stored entries."""
+    with _counters_lock:
+        stats = dict(_counters)
+    stats['entries'] = CachedAnswer.objects.count()
+    return stats
+
+
+def tool_recorder():
+    """Callback handler that records which tools the agents used."""
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class ToolRecorder(BaseCallbackHandler):
+        run_inline = True
+
+        def __init__(self):
+            self.tools = set()
+
+        def on_agent_action(self, action, **kwargs):
+            self.tools.add(action.tool)
+
+    return ToolRecorder()
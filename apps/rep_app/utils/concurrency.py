@@ -0,0 +1,192 @@
+"""
+Coalescing and concurrency limits for agent calls.
+
+``SingleFlight`` lets identical in-flight questions share one execution:
+the first caller runs it, later callers await the same result.
+``ConcurrencyLimiter`` caps in-flight chats per user and agent executions
+per process. Executions beyond the global cap wait in a bounded queue; a
+request that cannot get a slot gets ``Overloaded`` with a suggested
+retry delay, which the views turn into HTTP 429 + ``Retry-After``.
+
+Both are safe to use from several event loops and threads (e.g. async
+views under WSGI), so they rely on thread locks and
+``concurrent.futures`` instead of asyncio primitives. Limits apply per
+process.
+"""
+import asyncio
+import concurrent.futures
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+# === ENV CONFIG ===
+CHAT_USER_CONCURRENCY = int(os.getenv("REP_CHAT_USER_CONCURRENCY", "2"))
+CHAT_GLOBAL_CONCURRENCY = int(os.getenv("REP_CHAT_GLOBAL_CONCURRENCY", "16"))
+CHAT_MAX_QUEUE = int(os.getenv("REP_CHAT_MAX_QUEUE", "64"))
+CHAT_QUEUE_TIMEOUT = float(os.getenv("REP_CHAT_QUEUE_TIMEOUT", "15"))
+CHAT_BATCH_MAX_QUESTIONS = int(os.getenv("REP_CHAT_BATCH_MAX_QUESTIONS", "50"))
+CHAT_BATCH_CONCURRENCY = int(os.getenv("REP_CHAT_BATCH_CONCURRENCY", "4"))
+
+# How often a queued request re-checks for a free slot
+POLL_INTERVAL = 0.05
+
+
+class Overloaded(Exception):
+    """No capacity for this request; retry after ``retry_after`` seconds."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class SingleFlight:
+    """Share one execution between concurrent callers with the same key."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    async def run(self, key, factory, join=True):
+        """
+        Await ``factory()`` once per key; concurrent callers get the same result.
+
+        With ``join=False`` the caller never waits on an execution started by
+        someone else: it runs its own ``factory()`` if one is already in flight.
+        Later callers can still join an execution it starts.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            own = not leader and not join
+            if leader:
+                call = self._calls[key] = {'future': concurrent.futures.Future(), 'waiters': 0, 'cancel': None}
+            elif not own:
+                self.coalesced += 1
+            if not own:
+                call['waiters'] += 1
+        if own:
+            return await factory()
+        future = call['future']
+
+        if leader:
+            task = asyncio.ensure_future(factory())
+            loop = asyncio.get_running_loop()
+            call['cancel'] = lambda: loop.call_soon_threadsafe(task.cancel)
+
+            def publish(task):
+                with self._lock:
+                    self._calls.pop(key, None)
+                if task.cancelled():
+                    future.cancel()
+                elif task.exception() is not None:
+                    future.set_exception(task.exception())
+                else:
+                    future.set_result(task.result())
+
+            task.add_done_callback(publish)
+
+        try:
+            # One caller going away must not cancel the execution others wait for
+            return await asyncio.shield(asyncio.wrap_future(future))
+        except asyncio.CancelledError:
+            with self._lock:
+                call['waiters'] -= 1
+                abandoned = call['waiters'] == 0 and not future.done()
+            if abandoned:
+                call['cancel']()  # nobody is waiting any more
+            raise
+
+    def stats(self):
+        with self._lock:
+            return {'in_flight': len(self._calls), 'coalesced': self.coalesced}
+
+
+class ConcurrencyLimiter:
+    """Per-user and global in-flight limits with a bounded wait queue."""
+
+    def __init__(self, per_user=CHAT_USER_CONCURRENCY, global_limit=CHAT_GLOBAL_CONCURRENCY,
+                 max_queue=CHAT_MAX_QUEUE, queue_timeout=CHAT_QUEUE_TIMEOUT):
+        self.per_user = per_user
+        self.global_limit = global_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._by_user = defaultdict(int)
+        self._in_flight = 0
+        self._waiting = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def _reject(self, message):
+        self.rejected += 1
+        # Rough time until the queue ahead drains
+        retry_after = max(1, math.ceil(self.queue_timeout * (self._waiting + 1) / max(self.max_queue, 1)))
+        raise Overloaded(message, retry_after)
+
+    def check(self, user_id):
+        """Raise Overloaded now if the request would certainly be rejected."""
+        with self._lock:
+            if self._by_user[user_id] >= self.per_user:
+                self._reject("Too many requests in progress for this user")
+            if self._waiting >= self.max_queue:
+                self._reject("Too many requests queued")
+
+    @asynccontextmanager
+    async def user_slot(self, user_id):
+        with self._lock:
+            if self._by_user[user_id] >= self.per_user:
+                self._reject("Too many requests in progress for this user")
+            self._by_user[user_id] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._by_user[user_id] -= 1
+                if not self._by_user[user_id]:
+                    del self._by_user[user_id]
+
+    @asynccontextmanager
+    async def global_slot(self):
+        deadline = time.monotonic() + self.queue_timeout
+        queued = False
+        try:
+            while True:
+                with self._lock:
+                    if self._in_flight < self.global_limit:
+                        self._in_flight += 1
+                        break
+                    if not queued:
+                        if self._waiting >= self.max_queue:
+                            self._reject("Too many requests queued")
+                        self._waiting += 1
+                        queued = True
+                    elif time.monotonic() >= deadline:
+                        self._reject("Timed out waiting for capacity")
+                await asyncio.sleep(POLL_INTERVAL)
+        finally:
+            if queued:
+                with self._lock:
+                    self._waiting -= 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': self._in_flight,
+                'waiting': self._waiting,
+                'users_in_flight': len(self._by_user),
+                'rejected': self.rejected,
+                'global_limit': self.global_limit,
+                'per_user_limit': self.per_user,
+            }
+
+
+chat_limiter = ConcurrencyLimiter()
+chat_single_flight = SingleFlight()
@@ -0,0 +1,120 @@
+"""
+Bounded conversation memory for the agents.
+
+Only the last ``REP_MEMORY_WINDOW`` messages of a session are read from the
+database. Older messages are folded into ``ChatSession.memory_summary`` by
+a background task (one short LLM call per turn at most), and
+``build_context()`` assembles summary + recent messages + the new question
+within ``REP_CONTEXT_TOKEN_BUDGET`` tokens.
+"""
+import os
+
+from ..models import ChatSession
+from .metrics import metrics_handler, stage
+from .tasks import enqueue
+
+# === ENV CONFIG ===
+MEMORY_WINDOW = int(os.getenv("REP_MEMORY_WINDOW", "6"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("REP_CONTEXT_TOKEN_BUDGET", "1500"))
+MEMORY_SUMMARY_MAX_TOKENS = 200
+
+# Rough but dependency-free: English and Czech average ~4 characters per token
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def load_recent_messages(session, user_input):
+    """Up to MEMORY_WINDOW messages before the current question, oldest first."""
+    recent = list(session.messages.order_by('-timestamp', '-id')[:MEMORY_WINDOW + 1])
+    # A caller may have stored the question already; it is not history
+    if recent and recent[0].is_user and recent[0].content == user_input:
+        recent = recent[1:]
+    return recent[:MEMORY_WINDOW][::-1]
+
+
+def _format_message(message, max_tokens=None):
+    content = message.content
+    if max_tokens is not None and estimate_tokens(content) > max_tokens:
+        content = content[:max_tokens * CHARS_PER_TOKEN] + "..."
+    return f"User: {content}" if message.is_user else f"Assistant: {content}"
+
+
+def build_context(session, recent_messages, user_input, budget=CONTEXT_TOKEN_BUDGET):
+    """
+    Prompt text with the rolling summary and as many recent messages as fit.
+
+    The question itself is always included; the newest messages win when the
+    budget runs out, and a single message may take at most half the budget.
+    """
+    question = f"User: {user_input}"
+    remaining = budget - estimate_tokens(question)
+
+    summary = ""
+    if session is not None and session.memory_summary:
+        summary = f"Summary of the earlier conversation: {session.memory_summary}"
+        remaining -= estimate_tokens(summary)
+
+    lines = []
+    for message in reversed(recent_messages):
+        line = _format_message(message, max_tokens=budget // 2)
+        cost = estimate_tokens(line)
+        if cost > remaining:
+            break
+        lines.append(line)
+        remaining -= cost
+
+    parts = ([summary] if summary else []) + lines[::-1] + [question]
+    return "\n".join(parts)
+
+
+def update_memory_summary(session_id):
+    """Fold messages that left the window into the session's rolling summary."""
+    session = ChatSession.objects.filter(id=session_id).first()
+    if session is None:
+        return
+
+    window_ids = list(
+        session.messages.order_by('-timestamp', '-id').values_list('id', flat=True)[:MEMORY_WINDOW]
+    )
+    if not window_ids:
+        return
+    to_fold = list(
+        session.messages.filter(id__gt=session.memory_upto_id, id__lt=min(window_ids))
+        .order_by('timestamp', 'id')
+    )
+    if not to_fold:
+        return
+
+    from .langchain_bot import get_llm  # langchain_bot builds its prompts with this module
+
+    llm = get_llm()
+    if llm is None:
+        raise RuntimeError("LLM not available")
+    transcript = "\n".join(_format_message(m, max_tokens=CONTEXT_TOKEN_BUDGET // 4) for m in to_fold)
+    prompt = (
+        "Update the running summary of a chat between a user and a real estate assistant. "
+        "Keep facts, numbers, regions and open questions; at most five sentences.\n\n"
+        f"Current summary: {session.memory_summary or '(empty)'}\n\nNew messages:\n{transcript}"
+    )
+    with stage('summary.memory'):
+        summary = llm.bind(max_tokens=MEMORY_SUMMARY_MAX_TOKENS).invoke(
+            prompt, config={"callbacks": [metrics_handler()]}
+        ).content.strip()
+
+    # Only apply if no other worker folded these messages meanwhile
+    ChatSession.objects.filter(id=session_id, memory_upto_id=session.memory_upto_id).update(
+        memory_summary=summary, memory_upto_id=to_fold[-1].id,
+    )
+
+
+def schedule_memory_update(session):
+    """Refresh the rolling summary in the background (a no-op until messages leave the window)."""
+    return enqueue(update_memory_summary, session.id)
+
+
+def has_context(session):
+    """True once the session has history the answer could depend on."""
+    return bool(session.memory_summary) or session.messages.exists()
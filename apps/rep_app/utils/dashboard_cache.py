@@ -0,0 +1,56 @@
+"""
+Versioned cache for the dashboard payload.
+
+Entries are keyed on the region filter and the ``region_stats`` version
+from ``get_stats_version()``, so a refresh makes every older entry
+unreachable.
+The keys written for the current version are tracked in a registry entry so
+they can also be evicted eagerly instead of waiting for their timeout.
+"""
+import hashlib
+import os
+
+from django.core.cache import cache
+
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv("DASHBOARD_CACHE_TIMEOUT", "3600"))
+
+VERSION_KEY = "dashboard:data_version"
+REGISTRY_KEY = "dashboard:keys"
+
+
+def dashboard_cache_key(region, data_version):
+    # Region names carry spaces and diacritics, which not every backend accepts
+    region_hash = hashlib.md5((region or "all").encode("utf-8")).hexdigest()
+    return f"dashboard:{data_version}:{region_hash}"
+
+
+def get_cached_dashboard(region, data_version):
+    """Return the cached payload for this region and data version, or None."""
+    try:
+        if cache.get(VERSION_KEY) != data_version:
+            # New data arrived since the entries were written
+            invalidate_dashboard_cache()
+            cache.set(VERSION_KEY, data_version, None)
+            return None
+        return cache.get(dashboard_cache_key(region, data_version))
+    except Exception as e:
+        print(f"Dashboard cache read error: {e}")
+        return None
+
+
+def set_cached_dashboard(region, data_version, payload):
+    """Store the dashboard payload for this region and data version."""
+    key = dashboard_cache_key(region, data_version)
+    try:
+        cache.set(key, payload, DASHBOARD_CACHE_TIMEOUT)
+        registry = cache.get(REGISTRY_KEY) or set()
+        registry.add(key)
+        cache.set(REGISTRY_KEY, registry, None)
+    except Exception as e:
+        print(f"Dashboard cache write error: {e}")
+
+
+def invalidate_dashboard_cache():
+    """Drop every cached dashboard entry."""
+    keys = cache.get(REGISTRY_KEY) or set()
+    cache.delete_many(list(keys) + [REGISTRY_KEY, VERSION_KEY])
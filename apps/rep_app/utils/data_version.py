@@ -0,0 +1,55 @@
+from .db_pool import get_connection
+
+
+def get_stats_version(cursor):
+    """
+    Return the version of the precomputed ``region_stats``.
+
+    This is the ``metrics_vals`` id the last refresh folded in, so it only
+    changes once a refresh has run, not when rows are ingested.
+    """
+    cursor.execute("SELECT last_metric_id FROM region_stats_watermark WHERE id = 1")
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def fetch_stats_version():
+    """Current region_stats version over a pooled connection, or None if unreachable."""
+    connection = get_connection()
+    if not connection:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            return get_stats_version(cursor)
+    except Exception as e:
+        print(f"Error reading region stats version: {e}")
+        return None
+    finally:
+        connection.close()
+
+
+def get_listings_version(cursor):
+    """
+    Return the version of the typed ``listings`` table the SQL agent queries.
+
+    This is the ``metrics_vals`` id the last listings sync folded in, so it
+    changes exactly when the rows the agent reads change.
+    """
+    cursor.execute("SELECT last_metric_id FROM listings_watermark WHERE id = 1")
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def fetch_listings_version():
+    """Current listings version over a pooled connection, or None if unreachable."""
+    connection = get_connection()
+    if not connection:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            return get_listings_version(cursor)
+    except Exception as e:
+        print(f"Error reading listings version: {e}")
+        return None
+    finally:
+        connection.close()
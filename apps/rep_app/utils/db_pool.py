@@ -0,0 +1,109 @@
+"""
+Shared, bounded connection pool for the PostgreSQL analytics database.
+
+Dashboard queries, the LangChain SQL agent and ingestion code all borrow
+connections from the same SQLAlchemy engine instead of opening their own.
+Every checkout is pinged first, connections are recycled after
+``REP_DB_POOL_RECYCLE`` seconds and ``pool_stats()`` reports usage.
+"""
+import os
+import threading
+
+# === ENV CONFIG ===
+PG_USER = os.getenv("POSTGRES_USER", "vanhieuvu")
+PG_PASS = os.getenv("POSTGRES_PASSWORD", "nanuk§2")
+PG_HOST = os.getenv("POSTGRES_HOST", "localhost")
+PG_PORT = os.getenv("POSTGRES_PORT", "4321")
+PG_DB = os.getenv("POSTGRES_DB", "rep_db")
+
+POOL_SIZE = int(os.getenv("REP_DB_POOL_SIZE", "5"))
+POOL_MAX_OVERFLOW = int(os.getenv("REP_DB_POOL_MAX_OVERFLOW", "5"))
+POOL_TIMEOUT = float(os.getenv("REP_DB_POOL_TIMEOUT", "10"))
+POOL_RECYCLE = int(os.getenv("REP_DB_POOL_RECYCLE", "1800"))
+
+_engine = None
+_engine_lock = threading.Lock()
+
+_counters = {
+    'connects': 0,
+    'checkouts': 0,
+    'checkins': 0,
+    'invalidations': 0,
+    'checkout_errors': 0,
+}
+_counters_lock = threading.Lock()
+
+
+def _count(name):
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def _create_engine():
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.engine import URL
+
+    url = URL.create(
+        "postgresql+psycopg2",
+        username=PG_USER,
+        password=PG_PASS,
+        host=PG_HOST,
+        port=int(PG_PORT),
+        database=PG_DB,
+    )
+    engine = create_engine(
+        url,
+        pool_size=POOL_SIZE,
+        max_overflow=POOL_MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_recycle=POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
+    event.listen(engine, 'connect', lambda *args: _count('connects'))
+    event.listen(engine, 'checkout', lambda *args: _count('checkouts'))
+    event.listen(engine, 'checkin', lambda *args: _count('checkins'))
+    event.listen(engine, 'invalidate', lambda *args: _count('invalidations'))
+    return engine
+
+
+def get_engine():
+    """Return the process-wide engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine()
+    return _engine
+
+
+def get_connection():
+    """
+    Borrow a DB-API (psycopg2) connection from the pool.
+
+    Calling ``close()`` on it hands it back to the pool. Returns None when
+    no healthy connection can be obtained within ``REP_DB_POOL_TIMEOUT``.
+    """
+    try:
+        return get_engine().raw_connection()
+    except Exception as e:
+        _count('checkout_errors')
+        print(f"Database connection error: {e}")
+        return None
+
+
+def pool_stats():
+    """Snapshot of pool occupancy and lifetime counters."""
+    with _counters_lock:
+        stats = dict(_counters)
+    if _engine is None:
+        return {'initialized': False, **stats}
+    pool = _engine.pool
+    return {
+        'initialized': True,
+        'size': pool.size(),
+        'max_overflow': POOL_MAX_OVERFLOW,
+        'checked_out': pool.checkedout(),
+        'checked_in': pool.checkedin(),
+        'overflow': pool.overflow(),
+        **stats,
+    }
@@ -0,0 +1,209 @@
+"""
+Deterministic offline stand-in for the OpenAI chat model.
+
+Selected with ``REP_LLM_BACKEND=fake``. ``FakeChatModel`` plays the parts
+the agents expect, without network or cost:
+
+* the routing agent (ReAct text) gets an ``Action: Real Estate DB`` for
+  metric questions (see ``intent_router``) and ``Action: General Chat``
+  otherwise, then a ``Final Answer`` repeating the tool's observation;
+* the SQL agent (tool calling) gets one scripted ``sql_db_query`` call and
+  then an answer quoting the query result;
+* any other prompt gets a short canned reply.
+
+Every call waits ``REP_FAKE_LLM_LATENCY`` seconds, streams its answer word
+by word ``REP_FAKE_LLM_TOKEN_DELAY`` seconds apart and reports token usage,
+so streaming, tracing and load tests see realistic behaviour.
+``REP_FAKE_LLM_SCRIPT`` may name a JSON file with extra rules, checked
+before the built-in ones: ``[{"match": "<regex>", "sql": "..."}]`` picks
+the SQL agent's query, ``[{"match": "<regex>", "answer": "..."}]`` fixes
+the reply to plain prompts.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Any, List
+
+from langchain_core.language_models.chat_models import (
+    BaseChatModel, agenerate_from_stream, generate_from_stream,
+)
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from .conversation_memory import estimate_tokens
+from .intent_router import METRICS, classify_message
+
+# === ENV CONFIG ===
+FAKE_LLM_LATENCY = float(os.getenv("REP_FAKE_LLM_LATENCY", "0.2"))
+FAKE_LLM_TOKEN_DELAY = float(os.getenv("REP_FAKE_LLM_TOKEN_DELAY", "0.01"))
+FAKE_LLM_SCRIPT = os.getenv("REP_FAKE_LLM_SCRIPT")
+
+SQL_TOOL = "sql_db_query"
+
+# First matching rule picks the SQL agent's query; the last one always matches
+SQL_SCRIPT = [
+    {'match': r"area|plocha|m2|m²|sqm", 'sql': (
+        "SELECT gl.region_name, ROUND(AVG(l.usable_area_m2), 1) AS avg_area_m2 "
+        "FROM listings l JOIN geo_location gl ON gl.id = l.geo_loc_id "
+        "GROUP BY gl.region_name ORDER BY avg_area_m2 DESC LIMIT 5"
+    )},
+    {'match': r"how many|count|kolik|pocet|počet", 'sql': (
+        "SELECT gl.region_name, COUNT(*) AS listings "
+        "FROM listings l JOIN geo_location gl ON gl.id = l.geo_loc_id "
+        "GROUP BY gl.region_name ORDER BY listings DESC LIMIT 5"
+    )},
+    {'match': r"", 'sql': (
+        "SELECT gl.region_name, ROUND(AVG(l.monthly_price)) AS avg_monthly_rent "
+        "FROM listings l JOIN geo_location gl ON gl.id = l.geo_loc_id "
+        "GROUP BY gl.region_name ORDER BY avg_monthly_rent DESC LIMIT 5"
+    )},
+]
+
+_QUESTION_RE = re.compile(r"Question:\s*(.*?)\s*\nThought:", re.DOTALL)
+_OBSERVATION_RE = re.compile(r"Observation:\s*(.*?)\s*(?:\nThought:|$)", re.DOTALL)
+
+
+def load_script(path):
+    """Rules from a REP_FAKE_LLM_SCRIPT file, or [] when unset or unreadable."""
+    if not path:
+        return []
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError) as e:
+        print(f"Failed to load fake LLM script {path}: {e}")
+        return []
+
+
+def _first_rule(rules, key, text):
+    for rule in rules:
+        if key in rule and re.search(rule['match'], text, re.IGNORECASE):
+            return rule[key]
+    return None
+
+
+def _clip(text, limit=400):
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+class FakeChatModel(BaseChatModel):
+    """Scripted chat model; see the module docstring for what it answers."""
+
+    latency: float = FAKE_LLM_LATENCY
+    token_delay: float = FAKE_LLM_TOKEN_DELAY
+    script: List[dict] = []
+    streaming: bool = True
+
+    @classmethod
+    def from_env(cls):
+        return cls(script=load_script(FAKE_LLM_SCRIPT))
+
+    @property
+    def _llm_type(self):
+        return "rep-fake-chat"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    # === SCRIPT ===
+    def _respond(self, messages, tools=None):
+        """The scripted reply as an AIMessage (content or tool calls)."""
+        prompt = "\n".join(str(m.content) for m in messages)
+        if tools:
+            return self._sql_agent_step(messages)
+        if "Action Input:" in prompt and _QUESTION_RE.search(prompt):
+            return AIMessage(content=self._react_step(prompt))
+        return AIMessage(content=self._plain_reply(messages))
+
+    def _react_step(self, prompt):
+        match = list(_QUESTION_RE.finditer(prompt))[-1]
+        question, scratchpad = match.group(1), prompt[match.end():]
+        observations = _OBSERVATION_RE.findall(scratchpad)
+        if observations:
+            return f"Thought: I now know the final answer\nFinal Answer: {observations[-1]}"
+        intent, _ = classify_message(question)
+        tool = "Real Estate DB" if intent == METRICS else "General Chat"
+        return f"Thought: I should use {tool}.\nAction: {tool}\nAction Input: {question}"
+
+    def _sql_agent_step(self, messages):
+        question = next((m.content for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+        results = [m.content for m in messages if isinstance(m, ToolMessage)]
+        if results:
+            if results[-1].startswith("Error"):
+                return AIMessage(content="I could not get that from the database right now.")
+            return AIMessage(content=f"According to the database: {_clip(results[-1])}")
+        sql = _first_rule(self.script, 'sql', question) or _first_rule(SQL_SCRIPT, 'sql', question)
+        call_id = "call_" + hashlib.sha1(question.encode("utf-8")).hexdigest()[:12]
+        return AIMessage(content="", tool_calls=[{'name': SQL_TOOL, 'args': {'query': sql}, 'id': call_id}])
+
+    def _plain_reply(self, messages):
+        text = str(messages[-1].content).strip() if messages else ""
+        answer = _first_rule(self.script, 'answer', text)
+        if answer is not None:
+            return answer
+        # Prompts built from context end with the user's question
+        question = text.splitlines()[-1] if text else ""
+        question = question.split(":", 1)[-1].strip() if question.startswith("User:") else question
+        return f"(offline model) You said: {_clip(question, 80)}"
+
+    def _usage(self, messages, message):
+        output = message.content or json.dumps(message.tool_calls)
+        input_tokens = sum(estimate_tokens(str(m.content)) for m in messages)
+        output_tokens = estimate_tokens(output)
+        return {'input_tokens': input_tokens, 'output_tokens': output_tokens,
+                'total_tokens': input_tokens + output_tokens}
+
+    def _chunks(self, messages, tools):
+        message = self._respond(messages, tools)
+        if message.tool_calls:
+            call = message.tool_calls[0]
+            yield AIMessageChunk(content="", tool_call_chunks=[{
+                'name': call['name'], 'args': json.dumps(call['args']), 'id': call['id'], 'index': 0,
+            }])
+        else:
+            for token in re.split(r"(\s+)", message.content):
+                if token:
+                    yield AIMessageChunk(content=token)
+        yield AIMessageChunk(content="", usage_metadata=self._usage(messages, message))
+
+    # === LANGCHAIN INTERFACE ===
+    # Like ChatOpenAI, invoke() streams when ``streaming`` is set, so callbacks get tokens
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.streaming:
+            return generate_from_stream(self._stream(messages, stop, run_manager, **kwargs))
+        time.sleep(self.latency)
+        message = self._respond(messages, kwargs.get('tools'))
+        message.usage_metadata = self._usage(messages, message)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.streaming:
+            return await agenerate_from_stream(self._astream(messages, stop, run_manager, **kwargs))
+        await asyncio.sleep(self.latency)
+        message = self._respond(messages, kwargs.get('tools'))
+        message.usage_metadata = self._usage(messages, message)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        time.sleep(self.latency)
+        for chunk in self._chunks(messages, kwargs.get('tools')):
+            if chunk.content:
+                time.sleep(self.token_delay)
+            generation = ChatGenerationChunk(message=chunk)
+            if run_manager and chunk.content:
+                run_manager.on_llm_new_token(chunk.content, chunk=generation)
+            yield generation
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        await asyncio.sleep(self.latency)
+        for chunk in self._chunks(messages, kwargs.get('tools')):
+            if chunk.content:
+                await asyncio.sleep(self.token_delay)
+            generation = ChatGenerationChunk(message=chunk)
+            if run_manager and chunk.content:
+                await run_manager.on_llm_new_token(chunk.content, chunk=generation)
+            yield generation
@@ -0,0 +1,89 @@
+"""
+Local, zero-network routing of chat messages.
+
+The routing agent spends an LLM call deciding between the "Real Estate DB"
+and "General Chat" tools. ``route_message()`` makes that decision from a
+small weighted lexicon (English and Czech) instead: clear small talk goes to
+the plain LLM, clear metric questions go to the SQL agent, and anything it
+is not confident about (below ``REP_ROUTER_THRESHOLD``) is left to the
+routing agent. A message that mentions any metric or region, or that
+follows earlier conversation, is never sent to the plain LLM, which has no
+database access; advice questions ("should I rent...") are left to the
+routing agent, which can use both tools.
+"""
+import math
+import os
+import re
+import unicodedata
+
+# === ENV CONFIG ===
+ROUTER_THRESHOLD = float(os.getenv("REP_ROUTER_THRESHOLD", "0.85"))
+
+CHAT = "chat"
+METRICS = "metrics"
+
+# Patterns match accent-free lowercase text; positive weights mean "metric question".
+WEIGHTED_PATTERNS = [
+    # Small talk
+    (r"^(hi|hello|hey|hiya|yo|ahoj|cau|cus|nazdar|zdravim|dobry (den|vecer)|good (morning|evening|afternoon))\b", -3.0),
+    (r"\b(thanks|thank you|thx|dekuji|dekuju|diky|super|great|awesome|perfect|ok|okay)\b", -2.5),
+    (r"\b(bye|goodbye|see you|nashledanou|mej se)\b", -3.0),
+    (r"\b(how are you|who are you|what can you do|jak se mas|kdo jsi|co umis)\b", -3.0),
+    (r"\b(joke|vtip|weather|pocasi)\b", -2.0),
+    # Metric vocabulary
+    (r"\b(rent|rents|rental|najem|najemne|price|prices|cena|ceny|cost|costs|naklady)\b", 2.0),
+    (r"\b(area|m2|sqm|square met(er|re)s?|plocha|vymera|metru)\b|m²", 2.0),
+    (r"\b(average|avg|mean|median|prumer|prumerna|prumerny|total|celkem|count|pocet|how many|kolik)\b", 1.5),
+    (r"\b(cheapest|most expensive|highest|lowest|min|max|nejlevnejsi|nejdrazsi|nejvyssi|nejnizsi)\b", 1.5),
+    (r"\b(listings?|propert(y|ies)|flats?|apartments?|inzerat\w*|byt\w*|nemovitost\w*)\b", 1.0),
+    (r"\b(region|regions|district|city|lokalit\w*|ctvrt\w*|mest\w*)\b", 1.0),
+    (r"\b(praha|prague|brno|ostrava|plzen|liberec|olomouc)\b", 1.0),
+    (r"\b(czk|kc|korun)\b|\d", 0.5),
+]
+_COMPILED = [(re.compile(pattern), weight) for pattern, weight in WEIGHTED_PATTERNS]
+
+# Advice rather than data ("Should I rent a flat in Brno?"): the SQL agent has
+# no General Chat fallback, so these always go to the routing agent
+ADVICE_RE = re.compile(
+    r"\b(should (i|we)|is it better|better to|worth it|recommend\w*|advi[cs]e|buy|mortgage|"
+    r"vyplati se|mam si|doporuc\w*|koupit|hypotek\w*)\b"
+)
+
+# Score of a message that matches nothing; slightly conversational
+BIAS = -0.5
+
+
+def fold_text(text):
+    """Lowercase and strip diacritics, so "Průměrná" matches "prumerna"."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).strip()
+
+
+def _matched_weights(text):
+    folded = fold_text(text)
+    return [weight for pattern, weight in _COMPILED if pattern.search(folded)]
+
+
+def classify_message(text):
+    """Return ``(intent, confidence)`` where intent is CHAT or METRICS."""
+    score = BIAS + sum(_matched_weights(text))
+    p_metrics = 1 / (1 + math.exp(-score))
+    if p_metrics >= 0.5:
+        return METRICS, p_metrics
+    return CHAT, 1 - p_metrics
+
+
+def route_message(text, threshold=ROUTER_THRESHOLD, has_context=False):
+    """
+    CHAT or METRICS when confident enough, else None (use the routing agent).
+
+    CHAT is only returned for a message without metric or region words and
+    without earlier conversation ("ok, and what about Brno?" needs data);
+    advice questions always get None.
+    """
+    intent, confidence = classify_message(text)
+    if confidence < threshold or ADVICE_RE.search(fold_text(text)):
+        return None
+    if intent == CHAT and (has_context or any(weight > 0 for weight in _matched_weights(text))):
+        return None
+    return intent
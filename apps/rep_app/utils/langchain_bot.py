@@ -1,79 +1,200 @@
 from typing import List
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
-from langchain_openai import ChatOpenAI
-from langchain.agents import Tool, initialize_agent
-from langchain_community.utilities import SQLDatabase
-from langchain_community.agent_toolkits.sql.base import create_sql_agent
+from asgiref.sync import sync_to_async
 from ..models import ChatSession, ChatMessage
+from .db_pool import get_engine
+from .schema_prompt import get_schema_prompt
+from .intent_router import CHAT, METRICS, route_message
+from .metric_templates import answer_metric_question
+from .answer_cache import CACHEABLE_TOOL, get_cached_answer, set_cached_answer, tool_recorder
+from .conversation_memory import build_context, load_recent_messages
+from .metrics import chat_trace, incr, metrics_handler, stage
 import os
+import threading
 
 # === ENV CONFIG ===
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-PG_USER = os.getenv("POSTGRES_USER", "vanhieuvu")
-PG_PASS = os.getenv("POSTGRES_PASSWORD", "nanuk§2")
-PG_HOST = os.getenv("POSTGRES_HOST", "localhost")
-PG_PORT = os.getenv("POSTGRES_PORT", "4321")
-PG_DB = os.getenv("POSTGRES_DB", "rep_db")
+# "openai", or "fake" for the offline scripted model (see fake_llm.py)
+LLM_BACKEND = os.getenv("REP_LLM_BACKEND", "openai")
+
+# === LAZY PROVIDERS ===
+# Nothing is built at import time: the LLM, the SQL database (schema
+# reflection) and both agents are created on first use, once per process.
+# A failed build is not cached, so the next call retries it.
+_resources = {}
+_resources_lock = threading.RLock()  # re-entrant: agents build on the LLM and DB
+
+
+def _get_or_create(name, factory):
+    resource = _resources.get(name)
+    if resource is not None:
+        return resource
+    with _resources_lock:
+        if name not in _resources:
+            resource = factory()
+            if resource is None:
+                return None
+            _resources[name] = resource
+        return _resources[name]
+
 
 # === LLM ===
-if not OPENAI_API_KEY:
-    print("Warning: OPENAI_API_KEY not set")
-    llm = None
-else:
+def _create_llm():
+    if LLM_BACKEND == "fake":
+        from .fake_llm import FakeChatModel
+
+        print("✅ Offline fake LLM initialized")
+        return FakeChatModel.from_env()
+    if LLM_BACKEND != "openai":
+        print(f"Unknown REP_LLM_BACKEND: {LLM_BACKEND}")
+        return None
+    if not OPENAI_API_KEY:
+        print("Warning: OPENAI_API_KEY not set")
+        return None
     try:
-        llm = ChatOpenAI(temperature=0, api_key=OPENAI_API_KEY)
+        from langchain_openai import ChatOpenAI
+
+        # Streaming only changes how tokens arrive; callers still get full messages
+        # stream_usage: token counts are reported for streamed responses too
+        llm = ChatOpenAI(temperature=0, api_key=OPENAI_API_KEY, streaming=True, stream_usage=True)
         print("✅ LLM initialized successfully")
+        return llm
     except Exception as e:
         print(f"Failed to initialize LLM: {e}")
-        llm = None
+        return None
+
+
+def get_llm():
+    """Shared chat model, or None if it cannot be created."""
+    return _get_or_create('llm', _create_llm)
+
 
 # === SQL DB SETUP ===
-try:
-    connection_uri = f"postgresql+psycopg2://{PG_USER}:{PG_PASS}@{PG_HOST}:{PG_PORT}/{PG_DB}"
-    db = SQLDatabase.from_uri(
-        connection_uri,
-        include_tables=["metrics_vals", "geo_location"],
-        sample_rows_in_table_info=2
-    )
-    print("✅ SQL Database connected successfully")
-except Exception as e:
-    print(f"Failed to connect to SQL database: {e}")
-    db = None
+def _create_sql_database():
+    try:
+        from .sql_cache import CachingSQLDatabase
+
+        # Shares the pool used by the dashboard queries; repeated queries are memoized
+        db = CachingSQLDatabase(
+            get_engine(),
+            include_tables=["listings", "geo_location"],
+            # The agent prompt already describes the schema (see schema_prompt.py)
+            sample_rows_in_table_info=0
+        )
+        print("✅ SQL Database connected successfully")
+        return db
+    except Exception as e:
+        print(f"Failed to connect to SQL database: {e}")
+        return None
+
+
+def get_sql_database():
+    """Shared SQLDatabase over the analytics tables, or None if unreachable."""
+    return _get_or_create('db', _create_sql_database)
+
+
+def sql_cache_stats():
+    """Result-cache counters of the SQL agent's database, or None before it is built."""
+    db = _resources.get('db')
+    return db.cache_stats() if db is not None else None
+
 
 # === SQL Agent (direct call version) ===
-if llm and db:
+# Replaces the default "I should look at the tables..." opening turn: the
+# schema is already in the system prompt
+SQL_AGENT_SUFFIX = "The schema is in the system prompt, so I can write the query directly."
+
+# Schema-discovery tools, not offered when the prompt carries the schema
+SCHEMA_DISCOVERY_TOOLS = ("sql_db_list_tables", "sql_db_schema")
+
+
+def sql_agent_prompt(schema):
+    """SQL agent prompt with the precomputed schema and no schema-discovery step."""
+    from langchain_community.agent_toolkits.sql.prompt import SQL_PREFIX
+    from langchain_core.messages import AIMessage
+    from langchain_core.prompts import (
+        ChatPromptTemplate, HumanMessagePromptTemplate, MessagesPlaceholder, SystemMessagePromptTemplate,
+    )
+
+    # dialect and top_k are filled in by create_sql_agent()
+    system = SQL_PREFIX + "\n\n" + schema.replace("{", "{{").replace("}", "}}")
+    return ChatPromptTemplate.from_messages([
+        SystemMessagePromptTemplate.from_template(system),
+        HumanMessagePromptTemplate.from_template("{input}"),
+        AIMessage(content=SQL_AGENT_SUFFIX),
+        MessagesPlaceholder(variable_name="agent_scratchpad"),
+    ])
+
+
+def _create_sql_agent():
+    llm, db = get_llm(), get_sql_database()
+    if not (llm and db):
+        return None
     try:
-        agent_executor = create_sql_agent(
-            llm=llm,
-            db=db,
-            agent_type="openai-tools",
-            verbose=True
-        )
+        from langchain_community.agent_toolkits.sql.base import create_sql_agent
+        from langchain_community.agent_toolkits.sql.toolkit import SQLDatabaseToolkit
+
+        # Precomputed schema in the system prompt saves the schema-discovery turns
+        schema = get_schema_prompt()
+        if not schema:
+            agent_executor = create_sql_agent(llm=llm, db=db, agent_type="openai-tools", verbose=True)
+        else:
+            class QueryToolkit(SQLDatabaseToolkit):
+                def get_tools(self):
+                    return [tool for tool in super().get_tools() if tool.name not in SCHEMA_DISCOVERY_TOOLS]
+
+            agent_executor = create_sql_agent(
+                llm=llm,
+                toolkit=QueryToolkit(db=db, llm=llm),
+                agent_type="openai-tools",
+                prompt=sql_agent_prompt(schema),
+                verbose=True
+            )
         print("✅ SQL Agent created successfully")
+        return agent_executor
     except Exception as e:
         print(f"Failed to create SQL agent: {e}")
-        agent_executor = None
-else:
-    agent_executor = None
+        return None
+
+
+def get_sql_agent():
+    """Shared SQL agent executor, or None if the LLM or database is missing."""
+    return _get_or_create('agent_executor', _create_sql_agent)
+
 
 def ask_agent(question: str) -> str:
     """Direct access to SQL agent."""
+    tool_agent = get_tool_agent()
     if tool_agent:
         return tool_agent.run(question)
     else:
         return "SQL agent not available"
 
+
 # === Tools for routing ===
-if llm and agent_executor:
+def _create_tool_agent():
+    llm, agent_executor = get_llm(), get_sql_agent()
+    if not (llm and agent_executor):
+        print("❌ Tool agent not available - missing LLM or SQL agent")
+        return None
+
+    from langchain.agents import Tool, initialize_agent
+
+    async def general_chat(q, callbacks=None):
+        return (await llm.ainvoke(q, config={"callbacks": callbacks})).content
+
+    # Each tool has a sync and an async implementation, used by run() and arun()
     tools = [
         Tool(
             name="Real Estate DB",
-            func=lambda q: agent_executor.run(q),
+            # Accepting callbacks lets LangChain pass the parent run's handlers down
+            func=lambda q, callbacks=None: agent_executor.run(q, callbacks=callbacks),
+            coroutine=lambda q, callbacks=None: agent_executor.arun(q, callbacks=callbacks),
             description="Use ONLY when the question is about specific real estate metrics stored in a database (e.g. price, area, location, values). NEVER use for greetings, general conversation, or casual questions."
         ),
         Tool(
             name="General Chat",
-            func=lambda q: llm.invoke(q).content,
+            func=lambda q, callbacks=None: llm.invoke(q, config={"callbacks": callbacks}).content,
+            coroutine=general_chat,
             description="Use ONLY for friendly chat, greetings, emotional support, or any question NOT asking for a number or real estate metric."
         )
     ]
@@ -93,32 +214,140 @@ if llm and agent_executor:
         }
     )
     print("✅ Tool agent initialized successfully")
-else:
-    tool_agent = None
-    print("❌ Tool agent not available - missing LLM or SQL agent")
+    return tool_agent
+
+
+def get_tool_agent():
+    """Shared routing agent, or None if its dependencies are unavailable."""
+    return _get_or_create('tool_agent', _create_tool_agent)
+
+
+def warm_up():
+    """Build every lazy resource now instead of on the first chat message."""
+    return get_tool_agent() is not None
 
 # === Simple agent function for views.py ===
-def get_agent_response(user_input: str, session: ChatSession = None) -> str:
-    """Get response from the agent with session context"""
-    if not tool_agent:
-        return "I'm sorry, but I'm not able to access my tools right now."
-    
-    try:
-        # If we have session context, include recent messages
-        if session:
-            # Get recent messages safely without negative indexing
-            all_messages = list(session.messages.order_by('timestamp'))
-            if len(all_messages) > 0:
-                # Get last 3 messages safely
-                recent_messages = all_messages[-3:] if len(all_messages) >= 3 else all_messages
-                context = "\n".join([
-                    f"User: {m.content}" if m.is_user else f"Assistant: {m.content}"
-                    for m in recent_messages
-                ]) + f"\nUser: {user_input}"
-                return tool_agent.run(context)
-        
-        # Otherwise just use the direct input
-        return tool_agent.run(user_input)
-    except Exception as e:
-        print(f"Agent error: {e}")
-        return f"I'm having trouble processing your request. Please try again. (Error: {str(e)})"
\ No newline at end of file
+# LLM runs tagged with ANSWER_TAG produce the user-facing answer directly
+ANSWER_TAG = "answer"
+
+
+def _run_route(route, prompt, callbacks):
+    """Answer with the plain LLM, the SQL agent or (when unsure) the routing agent."""
+    if route == CHAT:
+        return get_llm().invoke(prompt, config={"callbacks": callbacks, "tags": [ANSWER_TAG]}).content
+    if route == METRICS:
+        return get_sql_agent().run(prompt, callbacks=callbacks, tags=[ANSWER_TAG])
+    return get_tool_agent().run(prompt, callbacks=callbacks)
+
+
+async def _arun_route(route, prompt, callbacks):
+    if route == CHAT:
+        return (await get_llm().ainvoke(prompt, config={"callbacks": callbacks, "tags": [ANSWER_TAG]})).content
+    if route == METRICS:
+        return await get_sql_agent().arun(prompt, callbacks=callbacks, tags=[ANSWER_TAG])
+    return await get_tool_agent().arun(prompt, callbacks=callbacks)
+
+
+def _is_cacheable(route, recorder):
+    return route == METRICS or CACHEABLE_TOOL in recorder.tools
+
+
+def get_agent_response(user_input: str, session: ChatSession = None, callbacks: List = None,
+                       recent_messages: List[ChatMessage] = None) -> str:
+    """
+    Get response from the agent with session context; callbacks observe the run.
+
+    ``recent_messages`` replaces the session's latest messages as history,
+    e.g. for a batch that pins the history from before it started.
+    """
+    with chat_trace('chat', session_id=session.id if session else None) as trace:
+        try:
+            # Bounded window of earlier messages plus the session's rolling summary
+            if recent_messages is None:
+                with stage('chat.memory'):
+                    recent_messages = load_recent_messages(session, user_input) if session else []
+            has_summary = bool(session and session.memory_summary)
+
+            # Questions asked without prior conversation are answered from region_stats
+            # (common metric questions, no LLM call) or from the answer cache
+            context_free = not recent_messages and not has_summary
+            if context_free:
+                with stage('chat.templates'):
+                    templated = answer_metric_question(user_input)
+                if templated is not None:
+                    trace['route'] = 'template'
+                    return templated
+                with stage('chat.answer_cache'):
+                    cached = get_cached_answer(user_input)
+                incr('answer_cache.hits' if cached is not None else 'answer_cache.misses')
+                if cached is not None:
+                    trace['route'] = 'cache'
+                    return cached
+
+            tool_agent = get_tool_agent()
+            if not tool_agent:
+                return "I'm sorry, but I'm not able to access my tools right now."
+            recorder = tool_recorder()
+            callbacks = (callbacks or []) + [recorder, metrics_handler()]
+
+            prompt = user_input if context_free else build_context(session, recent_messages, user_input)
+
+            # Clear cases skip the routing agent's LLM call
+            route = trace['route'] = route_message(user_input, has_context=not context_free) or 'agent'
+            incr(f"route.{route}")
+            with stage(f"chat.{route}"):
+                response = _run_route(route, prompt, callbacks)
+
+            if context_free and _is_cacheable(route, recorder):
+                set_cached_answer(user_input, response)
+            return response
+        except Exception as e:
+            print(f"Agent error: {e}")
+            return f"I'm having trouble processing your request. Please try again. (Error: {str(e)})"
+
+
+async def get_agent_response_async(user_input: str, session: ChatSession = None, callbacks: List = None,
+                                   recent_messages: List[ChatMessage] = None) -> str:
+    """Async get_agent_response(): awaits the LLM and agents instead of blocking a thread"""
+    with chat_trace('chat', session_id=session.id if session else None) as trace:
+        try:
+            if recent_messages is None:
+                recent_messages = []
+                if session:
+                    with stage('chat.memory'):
+                        recent_messages = await sync_to_async(load_recent_messages)(session, user_input)
+            has_summary = bool(session and session.memory_summary)
+
+            context_free = not recent_messages and not has_summary
+            if context_free:
+                with stage('chat.templates'):
+                    templated = await sync_to_async(answer_metric_question, thread_sensitive=False)(user_input)
+                if templated is not None:
+                    trace['route'] = 'template'
+                    return templated
+                with stage('chat.answer_cache'):
+                    cached = await sync_to_async(get_cached_answer)(user_input)
+                incr('answer_cache.hits' if cached is not None else 'answer_cache.misses')
+                if cached is not None:
+                    trace['route'] = 'cache'
+                    return cached
+
+            # The first call builds the agents (schema reflection); keep that off the event loop
+            tool_agent = await sync_to_async(get_tool_agent, thread_sensitive=False)()
+            if not tool_agent:
+                return "I'm sorry, but I'm not able to access my tools right now."
+            recorder = tool_recorder()
+            callbacks = (callbacks or []) + [recorder, metrics_handler()]
+
+            prompt = user_input if context_free else build_context(session, recent_messages, user_input)
+            route = trace['route'] = route_message(user_input, has_context=not context_free) or 'agent'
+            incr(f"route.{route}")
+            with stage(f"chat.{route}"):
+                response = await _arun_route(route, prompt, callbacks)
+
+            if context_free and _is_cacheable(route, recorder):
+                await sync_to_async(set_cached_answer)(user_input, response)
+            return response
+        except Exception as e:
+            print(f"Agent error: {e}")
+            return f"I'm having trouble processing your request. Please try again. (Error: {str(e)})"
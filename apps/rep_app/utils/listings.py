@@ -0,0 +1,158 @@
+"""
+Typed one-row-per-listing view of the ``metrics_vals`` EAV store.
+
+``listings`` pivots the numeric metrics of each ``(url, geo_loc_id)`` into
+real NUMERIC columns, so analytic queries no longer cast text values or
+self-join ``metrics_vals`` on ``url``. ``listings_watermark`` remembers the
+last ``metrics_vals.id`` folded in, and a sync only re-pivots listings that
+received new rows.
+
+Ingestion may run several writers at once: an id is only folded in once no
+transaction that could still commit a lower id is in flight (see
+``settled_high_water()``), so a slow writer's rows are never skipped.
+"""
+import os
+
+from psycopg2 import errors
+
+# === ENV CONFIG ===
+# How long a sync waits for in-flight metrics_vals writers before skipping a round
+SYNC_LOCK_TIMEOUT_MS = int(os.getenv("REP_SYNC_LOCK_TIMEOUT_MS", "2000"))
+
+# Metrics stored as NUMERIC columns; add a name here to get a new column.
+NUMERIC_METRICS = ('monthly_price', 'usable_area_m2')
+
+# === SCHEMA ===
+CREATE_TABLES_SQL = """
+CREATE TABLE IF NOT EXISTS listings (
+    url TEXT NOT NULL,
+    geo_loc_id INTEGER NOT NULL,
+    monthly_price NUMERIC,
+    usable_area_m2 NUMERIC,
+    price_per_m2 NUMERIC GENERATED ALWAYS AS (monthly_price / NULLIF(usable_area_m2, 0)) STORED,
+    last_metric_id BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (url, geo_loc_id)
+);
+CREATE TABLE IF NOT EXISTS listings_watermark (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    last_metric_id BIGINT NOT NULL DEFAULT 0
+);
+INSERT INTO listings_watermark (id, last_metric_id) VALUES (1, 0)
+ON CONFLICT (id) DO NOTHING;
+"""
+
+ADD_METRIC_COLUMN_SQL = "ALTER TABLE listings ADD COLUMN IF NOT EXISTS {metric} NUMERIC"
+
+# Built outside a transaction by ``manage.py ensure_analytics_schema``.
+INDEXES_SQL = (
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS listings_geo_loc_id_idx ON listings (geo_loc_id)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS metrics_vals_url_idx ON metrics_vals (url)",
+)
+
+# Latest value of every numeric metric per listing in scope.
+UPSERT_LISTINGS_SQL = """
+INSERT INTO listings (url, geo_loc_id, {columns}, last_metric_id, updated_at)
+SELECT
+    mv.url,
+    mv.geo_loc_id,
+    {pivots},
+    MAX(mv.id),
+    now()
+FROM metrics_vals mv
+WHERE mv.metric = ANY(%(metrics)s) {scope}
+GROUP BY mv.url, mv.geo_loc_id
+ON CONFLICT (url, geo_loc_id) DO UPDATE SET
+    {updates},
+    last_metric_id = EXCLUDED.last_metric_id,
+    updated_at = EXCLUDED.updated_at
+"""
+
+PIVOT_SQL = (
+    "(ARRAY_AGG(CAST(mv.value AS DECIMAL) ORDER BY mv.id DESC) "
+    "FILTER (WHERE mv.metric = '{metric}'))[1]"
+)
+
+# Listings that received rows in the (watermark, high water] id range.
+TOUCHED_SCOPE_SQL = """
+AND (mv.url, mv.geo_loc_id) IN (
+    SELECT url, geo_loc_id FROM metrics_vals
+    WHERE id > %(watermark)s AND id <= %(high_water)s
+)
+"""
+
+
+def ensure_listings_table(cursor):
+    """Create the listings tables and any missing metric column (indexes: INDEXES_SQL)."""
+    cursor.execute(CREATE_TABLES_SQL)
+    for metric in NUMERIC_METRICS:
+        cursor.execute(ADD_METRIC_COLUMN_SQL.format(metric=metric))
+
+
+def settled_high_water(connection, wait=False):
+    """
+    Highest ``metrics_vals.id`` below which no new row can still appear.
+
+    Writers hold ROW EXCLUSIVE on ``metrics_vals`` from before they draw an
+    id until they commit. A SHARE lock therefore waits for every in-flight
+    writer, and the ``MAX(id)`` read under it covers only settled ids. The
+    lock is released right away; new writers queue behind it meanwhile. It
+    waits at most ``REP_SYNC_LOCK_TIMEOUT_MS`` unless ``wait`` is set and
+    returns None when that runs out (a long ingest transaction is running).
+    """
+    try:
+        with connection.cursor() as cursor:
+            if not wait:
+                cursor.execute(f"SET LOCAL lock_timeout = {SYNC_LOCK_TIMEOUT_MS}")
+            cursor.execute("LOCK TABLE metrics_vals IN SHARE MODE")
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM metrics_vals")
+            high_water = cursor.fetchone()[0]
+        connection.commit()
+        return high_water
+    except errors.LockNotAvailable:
+        connection.rollback()
+        return None
+
+
+def sync_listings(connection, full=False):
+    """
+    Pivot new ``metrics_vals`` rows into ``listings``.
+
+    Only listings with rows above the stored watermark are re-pivoted unless
+    ``full`` is set, which rebuilds the table (the initial backfill). Returns
+    ``(written, high_water)``: the number of listings written and the
+    ``metrics_vals.id`` the table is now synced up to. While a long ingest
+    transaction is in flight an incremental sync writes nothing and the
+    watermark stays where it is.
+    """
+    settled = settled_high_water(connection, wait=full)
+    with connection.cursor() as cursor:
+        # Row lock serialises concurrent syncs (command vs. write hook).
+        cursor.execute("SELECT last_metric_id FROM listings_watermark WHERE id = 1 FOR UPDATE")
+        watermark = cursor.fetchone()[0]
+        high_water = watermark if settled is None else max(settled, watermark)
+
+        params = {'metrics': list(NUMERIC_METRICS)}
+        if full:
+            cursor.execute("TRUNCATE listings")
+            scope = ""
+        else:
+            if high_water <= watermark:
+                connection.commit()
+                return 0, high_water
+            scope = TOUCHED_SCOPE_SQL
+            params.update(watermark=watermark, high_water=high_water)
+
+        cursor.execute(UPSERT_LISTINGS_SQL.format(
+            columns=", ".join(NUMERIC_METRICS),
+            pivots=",\n    ".join(PIVOT_SQL.format(metric=m) for m in NUMERIC_METRICS),
+            updates=",\n    ".join(f"{m} = EXCLUDED.{m}" for m in NUMERIC_METRICS),
+            scope=scope,
+        ), params)
+        written = cursor.rowcount
+        cursor.execute(
+            "UPDATE listings_watermark SET last_metric_id = %s WHERE id = 1",
+            (high_water,),
+        )
+    connection.commit()
+    return written, high_water
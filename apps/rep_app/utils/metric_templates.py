@@ -0,0 +1,252 @@
+"""
+Deterministic answers for the most common metric questions.
+
+Questions like "average rent in Praha 7", "nejdražší nájem v Brně" or "how
+many listings are in Ostrava" map exactly onto the per-region aggregates in
+``region_stats``. ``answer_metric_question()`` recognizes these shapes
+(metric x average/min/max/count x region, or "which region has the highest
+...") and answers from ``region_stats`` without calling the LLM. Region
+names are matched in any Czech grammatical case ("v Praze 7", "v Brně").
+Anything it is not sure about returns None and goes to the agents.
+"""
+import re
+
+from psycopg2.extras import RealDictCursor
+
+from .db_pool import get_connection
+from .intent_router import fold_text
+from .region_stats import SELECT_STATS_SQL
+
+AVG, MIN, MAX, COUNT = "avg", "min", "max", "count"
+
+# metric -> label, unit and the region_stats columns per aggregate
+METRICS = {
+    'rent': {
+        'label': "monthly rent", 'unit': "CZK", 'digits': 0, 'count': 'rent_count',
+        AVG: 'avg_monthly_rent', MIN: 'min_monthly_rent', MAX: 'max_monthly_rent',
+    },
+    'area': {
+        'label': "usable area", 'unit': "m²", 'digits': 1, 'count': 'area_count',
+        'labels': {MIN: "smallest", MAX: "largest"},
+        AVG: 'avg_area_m2', MIN: 'min_area_m2', MAX: 'max_area_m2',
+    },
+    'price_per_m2': {
+        'label': "rent per m²", 'unit': "CZK/m²", 'digits': 0, 'count': 'price_per_m2_count',
+        AVG: 'price_per_m2', MIN: 'min_price_per_m2', MAX: 'max_price_per_m2',
+    },
+    'listings': {'label': "listings", 'count': 'total_properties'},
+}
+
+AGGREGATE_LABELS = {AVG: "average", MIN: "lowest", MAX: "highest"}
+
+# All patterns run on accent-free lowercase text (see fold_text)
+PRICE_PER_M2_RE = re.compile(r"(\bper|\bza|/)\s*(m2|sqm|metr\w*|square)|price_per_m2")
+RENT_RE = re.compile(r"\b(rent\w*|najem\w*|najm\w*|price|prices|cena|ceny|cenu|cost\w*|stoji)\b")
+AREA_RE = re.compile(r"\b(area|size|m2|sqm|plocha|plochu|plochy|rozloha|velikost\w*|vymer\w*)\b")
+LISTINGS_RE = re.compile(r"\b(listings?|propert\w*|flats?|apartments?|offers?|inzerat\w*|byt\w*|nemovitost\w*|nabid\w*)\b")
+COUNT_RE = re.compile(r"\b(how many|number of|count|pocet|kolik)\b")
+
+AVG_RE = re.compile(r"\b(average|avg|mean|typical|prumer\w*)\b")
+MIN_RE = re.compile(r"\b(min|minimum|minimal\w*|lowest|cheapest|smallest|fewest|least|nejnizsi\w*|nejlevnejsi\w*|nejmensi\w*|nejmene)\b")
+MAX_RE = re.compile(r"\b(max|maximum|maximal\w*|highest|most expensive|most (?:listings?|propert\w*|flats?|apartments?|offers?)|largest|biggest|nejvyssi\w*|nejdrazsi\w*|nejvetsi\w*|nejvic\w*|nejvice)\b")
+CHEAP_RE = re.compile(r"\b(cheapest|most expensive|nejlevnejsi\w*|nejdrazsi\w*)\b")
+
+RANKING_RE = re.compile(r"\b(which|where|kter\w*|kde|region|regions|district\w*|city|ctvrt\w*|lokalit\w*|mest\w*)\b")
+LOCATION_RE = re.compile(r"\b(in|at|near|around|v|ve|na|u)\b")
+
+# Filters and comparisons the aggregates cannot answer
+UNSUPPORTED_RE = re.compile(
+    r"\d\s*\+\s*(kk|1)|\b(bedroom\w*|room\w*|pokoj\w*|compare\w*|srovn\w*|versus|vs|than|nez|trend\w*|"
+    r"histor\w*|change\w*|zmen\w*|forecast|predict\w*|year\w*|rok\w*|last|minul\w*|under|below|above|over|"
+    r"between|pod|nad|mezi|less|more|vice|mene|median)\b"
+)
+
+# English exonyms of region name words
+ALIASES = {'prague': 'praha'}
+
+# Final consonants that alternate in Czech declension (Praha -> v Praze)
+ALTERNATIONS = {'h': 'z', 'g': 'z', 'k': 'c', 'r': 'r'}
+
+
+def _stems(word):
+    """Prefixes that every declined form of a region name word starts with."""
+    if word.isdigit() or len(word) <= 3:
+        return {word}
+    stem = word.rstrip("aeiouy") or word
+    if len(stem) > 4 and stem[-2] == "e" and stem[-1] in "cn":
+        stem = stem[:-2] + stem[-1]  # fleeting e: Liberec -> Liberci, Plzeň -> Plzni
+    stems = {stem}
+    if stem[-1] in ALTERNATIONS:
+        stems.add(stem[:-1] + ALTERNATIONS[stem[-1]])
+    return stems
+
+
+def _word_matches(token, stems):
+    return any(token == s or (token.startswith(s) and len(token) - len(s) <= 4 and not s.isdigit()) for s in stems)
+
+
+def find_region(text, region_names):
+    """
+    Return the single region named in ``text``, or None.
+
+    Raises ValueError when several different regions are mentioned.
+    """
+    tokens = [ALIASES.get(t, t) for t in re.findall(r"[a-z0-9]+", fold_text(text))]
+    matches = []
+    for name in region_names:
+        name_stems = [_stems(w) for w in re.findall(r"[a-z0-9]+", fold_text(name))]
+        if not name_stems:
+            continue
+        for start in range(len(tokens) - len(name_stems) + 1):
+            if all(_word_matches(tokens[start + i], stems) for i, stems in enumerate(name_stems)):
+                matches.append((start, start + len(name_stems), name))
+
+    # "Praha 7" also contains a match for a region called "Praha"; keep the longest
+    matches = [m for m in matches if not any(
+        o[0] <= m[0] and m[1] <= o[1] and (o[1] - o[0]) > (m[1] - m[0]) for o in matches
+    )]
+    names = {m[2] for m in matches}
+    if len(names) > 1:
+        raise ValueError("several regions mentioned")
+    return names.pop() if names else None
+
+
+def detect_metric(folded):
+    """Metric key asked about, or None when there is none or several."""
+    if PRICE_PER_M2_RE.search(folded):
+        return 'price_per_m2'
+    rent, area = bool(RENT_RE.search(folded)), bool(AREA_RE.search(folded))
+    if rent and area:
+        return None
+    if rent or (not area and CHEAP_RE.search(folded)):
+        return 'rent'
+    if area:
+        return 'area'
+    if LISTINGS_RE.search(folded) and (COUNT_RE.search(folded) or MIN_RE.search(folded) or MAX_RE.search(folded)):
+        return 'listings'
+    return None
+
+
+def parse_metric_question(text, region_names):
+    """
+    Recognize a supported question shape.
+
+    Returns ``{'metric', 'aggregate', 'region', 'ranking'}`` or None.
+    """
+    folded = fold_text(text)
+    if UNSUPPORTED_RE.search(folded):
+        return None
+    metric = detect_metric(folded)
+    if metric is None:
+        return None
+
+    is_min, is_max = bool(MIN_RE.search(folded)), bool(MAX_RE.search(folded))
+    if is_min and is_max:
+        return None
+    if metric == 'listings':
+        aggregate = MIN if is_min else MAX if is_max else COUNT
+    else:
+        aggregate = MIN if is_min else MAX if is_max else AVG
+
+    try:
+        region = find_region(text, region_names)
+    except ValueError:
+        return None
+
+    ranking = region is None and bool(RANKING_RE.search(folded))
+    if ranking and aggregate in (AVG, COUNT):
+        return None  # "which region ..." needs a highest/lowest
+    if not ranking and aggregate != COUNT and metric == 'listings':
+        return None
+    if region is None and not ranking and LOCATION_RE.search(folded):
+        return None  # a place we do not know, e.g. "in Paris"
+    return {'metric': metric, 'aggregate': aggregate, 'region': region, 'ranking': ranking}
+
+
+def _format(value, spec):
+    return f"{float(value):,.{spec['digits']}f} {spec['unit']}"
+
+
+def _listings(count):
+    return f"{count:,} listing" + ("" if count == 1 else "s")
+
+
+def render_answer(question, stats):
+    """Answer text for a parsed question from region_stats rows, or None."""
+    metric, aggregate = question['metric'], question['aggregate']
+    spec = METRICS[metric]
+    count_key = spec['count']
+    rows = [row for row in stats if row[count_key]]
+
+    if question['ranking']:
+        value_key = count_key if metric == 'listings' else spec[AVG]
+        rows = [row for row in rows if row[value_key] is not None]
+        if not rows:
+            return None
+        pick = min if aggregate == MIN else max
+        row = pick(rows, key=lambda r: r[value_key])
+        if metric == 'listings':
+            most = "fewest" if aggregate == MIN else "most"
+            return f"{row['region_name']} has the {most} listings: {row[count_key]:,}."
+        label = "lowest" if aggregate == MIN else "highest"
+        return (f"{row['region_name']} has the {label} average {spec['label']}: "
+                f"{_format(row[value_key], spec)} ({_listings(row[count_key])}).")
+
+    region = question['region']
+    if region is not None:
+        rows = [row for row in rows if row['region_name'] == region]
+    place = f"in {region}" if region else "across all regions"
+    if not rows:
+        if metric == 'listings':
+            return f"There are no listings {place}."
+        return f"There are no listings with {spec['label']} data {place}."
+
+    count = sum(row[count_key] for row in rows)
+    if metric == 'listings':
+        return f"There {'is' if count == 1 else 'are'} {_listings(count)} {place}."
+
+    if aggregate == AVG:
+        value = sum(row[spec[AVG]] * row[count_key] for row in rows) / count
+    else:
+        values = [row[spec[aggregate]] for row in rows]
+        if any(v is None for v in values):
+            return None  # min/max not computed yet (run a full refresh)
+        value = min(values) if aggregate == MIN else max(values)
+    label = spec.get('labels', {}).get(aggregate, AGGREGATE_LABELS[aggregate])
+    return (f"The {label} {spec['label']} {place} is "
+            f"{_format(value, spec)} (based on {_listings(count)}).")
+
+
+def load_region_stats():
+    """
+    region_stats rows as they are; None if the database is unreachable.
+
+    Refreshing is left to the ingestion signal and the refresh command, so a
+    chat message never waits on the watermark locks.
+    """
+    connection = get_connection()
+    if not connection:
+        return None
+    try:
+        with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(SELECT_STATS_SQL)
+            return cursor.fetchall()
+    except Exception as e:
+        print(f"Error loading region stats: {e}")
+        return None
+    finally:
+        connection.close()
+
+
+def answer_metric_question(text):
+    """Templated answer for a common metric question, or None to use the agents."""
+    # Cheap check before touching the database
+    if detect_metric(fold_text(text)) is None:
+        return None
+    stats = load_region_stats()
+    if not stats:
+        return None
+    question = parse_metric_question(text, [row['region_name'] for row in stats])
+    if question is None:
+        return None
+    return render_answer(question, stats)
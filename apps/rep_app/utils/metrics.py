@@ -0,0 +1,240 @@
+"""
+Latency, token and cache instrumentation for the chat pipeline.
+
+``stage()`` times a block and records it in a per-process latency
+histogram; ``incr()`` bumps a counter (cache hits, routing decisions,
+tokens). ``chat_trace()`` wraps one chat request: every stage, LLM call and
+tool call made while it is active is also added to that request's trace,
+which is printed as one JSON line when it ends (``REP_CHAT_TRACE_LOG``).
+``metrics_handler()`` is the LangChain callback handler that reports LLM
+and tool timings and token usage. ``metrics_snapshot()`` feeds the metrics
+endpoint.
+"""
+import bisect
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+
+# === ENV CONFIG ===
+TRACE_LOG = os.getenv("REP_CHAT_TRACE_LOG", "1") == "1"
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Long inputs (prompts, SQL) are cut in trace logs
+TRACE_TEXT_LIMIT = 500
+
+
+class Histogram:
+    """Fixed-bucket latency histogram with count, sum and max."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (max for the overflow bucket)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total / self.count * 1000, 1) if self.count else None,
+            'p50_ms': _ms(self.quantile(0.5)),
+            'p95_ms': _ms(self.quantile(0.95)),
+            'max_ms': _ms(self.max) if self.count else None,
+            'buckets': {
+                **{f"le_{bound}": n for bound, n in zip(LATENCY_BUCKETS, self.buckets)},
+                'inf': self.buckets[-1],
+            },
+        }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+_histograms = defaultdict(Histogram)
+_counters = defaultdict(int)
+_lock = threading.Lock()
+
+# Trace of the chat request being handled; sync_to_async and LangChain's
+# executors copy the context, so spans recorded in threads land here too.
+_current_trace = contextvars.ContextVar('chat_trace', default=None)
+
+
+def _clip(text):
+    text = str(text)
+    return text if len(text) <= TRACE_TEXT_LIMIT else text[:TRACE_TEXT_LIMIT] + '...'
+
+
+def incr(name, amount=1):
+    with _lock:
+        _counters[name] += amount
+    trace = _current_trace.get()
+    if trace is not None:
+        trace['counters'][name] = trace['counters'].get(name, 0) + amount
+
+
+def observe(name, seconds, **fields):
+    """Record a measured duration in the histogram and the current trace."""
+    with _lock:
+        _histograms[name].observe(seconds)
+    trace = _current_trace.get()
+    if trace is not None:
+        span = {'stage': name, 'ms': _ms(seconds)}
+        span.update({key: _clip(value) for key, value in fields.items()})
+        trace['spans'].append(span)
+
+
+@contextmanager
+def stage(name, **fields):
+    """Time the block as stage ``name``; failures are counted as ``<name>.errors``."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        incr(f"{name}.errors")
+        raise
+    finally:
+        observe(name, time.perf_counter() - started, **fields)
+
+
+@contextmanager
+def chat_trace(kind, **fields):
+    """Collect every stage of one chat request and log it as a JSON line."""
+    trace = {
+        'trace_id': uuid.uuid4().hex[:12],
+        'kind': kind,
+        **fields,
+        'spans': [],
+        'counters': {},
+    }
+    token = _current_trace.set(trace)
+    started = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        elapsed = time.perf_counter() - started
+        with _lock:
+            _histograms[f"{kind}.total"].observe(elapsed)
+        trace['total_ms'] = _ms(elapsed)
+        if TRACE_LOG:
+            print(f"chat trace {json.dumps(trace, ensure_ascii=False, default=str)}")
+
+
+def _token_usage(response):
+    """(prompt, completion) tokens reported for an LLM result, or None."""
+    prompt = completion = 0
+    found = False
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, 'message', None), 'usage_metadata', None)
+            if usage:
+                prompt += usage.get('input_tokens', 0)
+                completion += usage.get('output_tokens', 0)
+                found = True
+    if not found:
+        usage = (response.llm_output or {}).get('token_usage') or {}
+        if not usage:
+            return None
+        prompt, completion = usage.get('prompt_tokens', 0), usage.get('completion_tokens', 0)
+    return prompt, completion
+
+
+def metrics_handler():
+    """Callback handler recording LLM/tool latency, token usage and agent decisions."""
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    from .langchain_bot import ANSWER_TAG
+
+    class MetricsHandler(BaseCallbackHandler):
+        # Inline keeps the handler in the request's context, so spans reach its trace
+        run_inline = True
+
+        def __init__(self):
+            self._started = {}
+
+        def _start(self, run_id, name, detail=None):
+            self._started[run_id] = (time.perf_counter(), name, detail)
+
+        def _end(self, run_id, **fields):
+            started, name, detail = self._started.pop(run_id, (None, None, None))
+            if started is None:
+                return
+            if detail is not None:
+                fields['input'] = detail
+            observe(name, time.perf_counter() - started, **fields)
+
+        def on_llm_start(self, serialized, prompts, *, run_id, tags=None, **kwargs):
+            self._start(run_id, 'llm.answer' if ANSWER_TAG in (tags or []) else 'llm.agent')
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, tags=None, **kwargs):
+            self.on_llm_start(serialized, None, run_id=run_id, tags=tags)
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            usage = _token_usage(response)
+            if usage is None:
+                self._end(run_id)
+                return
+            prompt, completion = usage
+            incr('tokens.prompt', prompt)
+            incr('tokens.completion', completion)
+            self._end(run_id, prompt_tokens=prompt, completion_tokens=completion)
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            self._end(run_id, error=error)
+            incr('llm.errors')
+
+        def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+            name = (serialized or {}).get('name') or kwargs.get('name') or 'tool'
+            self._start(run_id, f"tool.{name}", _clip(input_str))
+
+        def on_tool_end(self, output, *, run_id, **kwargs):
+            self._end(run_id)
+
+        def on_tool_error(self, error, *, run_id, **kwargs):
+            self._end(run_id, error=error)
+            incr('tool.errors')
+
+        def on_agent_action(self, action, **kwargs):
+            incr(f"agent.action.{action.tool}")
+
+    return MetricsHandler()
+
+
+def metrics_snapshot():
+    """Latency histograms and counters recorded by this process."""
+    with _lock:
+        return {
+            'stages': {name: hist.snapshot() for name, hist in sorted(_histograms.items())},
+            'counters': dict(sorted(_counters.items())),
+        }
+
+
+def reset_metrics():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
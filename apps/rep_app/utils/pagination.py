@@ -0,0 +1,32 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is the ``(timestamp, id)`` of the last row the client has seen,
+encoded as an opaque URL-safe string. The next page is every row strictly
+before it in ``(timestamp, id)`` order, which an index on the ordering
+columns answers without OFFSET scans, however deep the client pages.
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+
+def encode_cursor(timestamp, pk):
+    raw = f"{timestamp.isoformat()}|{pk}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """Return ``(timestamp, id)``; raises ValueError for a malformed cursor."""
+    try:
+        timestamp, pk = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (TypeError, ValueError) as e:  # also covers bad base64 and bad unicode
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def before_cursor(cursor, timestamp_field="timestamp"):
+    """Filter for rows that come before the cursor in (timestamp, id) order."""
+    timestamp, pk = decode_cursor(cursor)
+    return Q(**{f"{timestamp_field}__lt": timestamp}) | Q(**{timestamp_field: timestamp, "id__lt": pk})
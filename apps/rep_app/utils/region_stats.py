@@ -0,0 +1,179 @@
+"""
+Precomputed per-region statistics for the dashboard.
+
+The dashboard used to aggregate the whole ``metrics_vals`` EAV table on every
+page load. ``region_stats`` keeps one row per ``geo_location`` with the
+counts and sums needed to derive every dashboard figure, aggregated from the
+typed ``listings`` table. ``region_stats_watermark`` remembers the last
+``metrics_vals.id`` folded in, so a refresh only recomputes the regions that
+received new rows.
+"""
+from .listings import sync_listings
+
+# === SCHEMA ===
+CREATE_TABLES_SQL = """
+CREATE TABLE IF NOT EXISTS region_stats (
+    geo_loc_id INTEGER PRIMARY KEY,
+    region_name TEXT NOT NULL,
+    rent_count BIGINT NOT NULL DEFAULT 0,
+    rent_sum NUMERIC NOT NULL DEFAULT 0,
+    area_count BIGINT NOT NULL DEFAULT 0,
+    area_sum NUMERIC NOT NULL DEFAULT 0,
+    price_per_m2_count BIGINT NOT NULL DEFAULT 0,
+    price_per_m2_sum NUMERIC NOT NULL DEFAULT 0,
+    rent_min NUMERIC,
+    rent_max NUMERIC,
+    area_min NUMERIC,
+    area_max NUMERIC,
+    price_per_m2_min NUMERIC,
+    price_per_m2_max NUMERIC,
+    total_properties BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE TABLE IF NOT EXISTS region_stats_watermark (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    last_metric_id BIGINT NOT NULL DEFAULT 0
+);
+INSERT INTO region_stats_watermark (id, last_metric_id) VALUES (1, 0)
+ON CONFLICT (id) DO NOTHING;
+"""
+
+# Built outside a transaction by ``manage.py ensure_analytics_schema``.
+INDEXES_SQL = (
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS region_stats_region_name_idx ON region_stats (region_name)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS geo_location_region_name_idx ON geo_location (region_name)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS metrics_vals_geo_loc_id_metric_idx ON metrics_vals (geo_loc_id, metric)",
+)
+
+# Columns added after the first release; filled in by the next full refresh.
+ADD_COLUMNS_SQL = """
+ALTER TABLE region_stats
+    ADD COLUMN IF NOT EXISTS rent_min NUMERIC,
+    ADD COLUMN IF NOT EXISTS rent_max NUMERIC,
+    ADD COLUMN IF NOT EXISTS area_min NUMERIC,
+    ADD COLUMN IF NOT EXISTS area_max NUMERIC,
+    ADD COLUMN IF NOT EXISTS price_per_m2_min NUMERIC,
+    ADD COLUMN IF NOT EXISTS price_per_m2_max NUMERIC;
+"""
+
+# Every dashboard figure for the regions in scope, in one pass over listings.
+UPSERT_STATS_SQL = """
+INSERT INTO region_stats (
+    geo_loc_id, region_name, rent_count, rent_sum, area_count, area_sum,
+    price_per_m2_count, price_per_m2_sum, rent_min, rent_max, area_min, area_max,
+    price_per_m2_min, price_per_m2_max, total_properties, updated_at
+)
+SELECT
+    gl.id,
+    gl.region_name,
+    COUNT(l.monthly_price),
+    COALESCE(SUM(l.monthly_price), 0),
+    COUNT(l.usable_area_m2),
+    COALESCE(SUM(l.usable_area_m2), 0),
+    COUNT(l.price_per_m2),
+    COALESCE(SUM(l.price_per_m2), 0),
+    MIN(l.monthly_price),
+    MAX(l.monthly_price),
+    MIN(l.usable_area_m2),
+    MAX(l.usable_area_m2),
+    MIN(l.price_per_m2),
+    MAX(l.price_per_m2),
+    COUNT(l.monthly_price),
+    now()
+FROM listings l
+JOIN geo_location gl ON l.geo_loc_id = gl.id
+WHERE TRUE {scope}
+GROUP BY gl.id, gl.region_name
+ON CONFLICT (geo_loc_id) DO UPDATE SET
+    region_name = EXCLUDED.region_name,
+    rent_count = EXCLUDED.rent_count,
+    rent_sum = EXCLUDED.rent_sum,
+    area_count = EXCLUDED.area_count,
+    area_sum = EXCLUDED.area_sum,
+    price_per_m2_count = EXCLUDED.price_per_m2_count,
+    price_per_m2_sum = EXCLUDED.price_per_m2_sum,
+    rent_min = EXCLUDED.rent_min,
+    rent_max = EXCLUDED.rent_max,
+    area_min = EXCLUDED.area_min,
+    area_max = EXCLUDED.area_max,
+    price_per_m2_min = EXCLUDED.price_per_m2_min,
+    price_per_m2_max = EXCLUDED.price_per_m2_max,
+    total_properties = EXCLUDED.total_properties,
+    updated_at = EXCLUDED.updated_at
+"""
+
+SELECT_STATS_SQL = """
+SELECT
+    region_name,
+    rent_sum / NULLIF(rent_count, 0) AS avg_monthly_rent,
+    rent_count,
+    area_sum / NULLIF(area_count, 0) AS avg_area_m2,
+    area_count,
+    price_per_m2_sum / NULLIF(price_per_m2_count, 0) AS price_per_m2,
+    price_per_m2_count,
+    rent_min AS min_monthly_rent,
+    rent_max AS max_monthly_rent,
+    area_min AS min_area_m2,
+    area_max AS max_area_m2,
+    price_per_m2_min AS min_price_per_m2,
+    price_per_m2_max AS max_price_per_m2,
+    total_properties
+FROM region_stats
+"""
+
+# Filter options, in the same order as the rent chart.
+SELECT_REGIONS_SQL = """
+SELECT region_name
+FROM region_stats
+WHERE rent_count > 0
+ORDER BY rent_sum / rent_count DESC
+"""
+
+
+def ensure_region_stats_tables(cursor):
+    """Create the statistics tables and any missing column (indexes: INDEXES_SQL)."""
+    cursor.execute(CREATE_TABLES_SQL)
+    cursor.execute(ADD_COLUMNS_SQL)
+
+
+def refresh_region_stats(connection, full=False):
+    """
+    Fold new ``metrics_vals`` rows into ``region_stats``.
+
+    ``listings`` is synced first and the statistics are aggregated from it,
+    up to the same ``metrics_vals.id``: rows committed after the sync are
+    left above the watermark for the next refresh. Only regions that received rows above the stored watermark are
+    recomputed unless ``full`` is set. Returns the number of regions
+    refreshed.
+    """
+    _, high_water = sync_listings(connection, full=full)
+
+    with connection.cursor() as cursor:
+        # Row lock serialises concurrent refreshes (command vs. write hook).
+        cursor.execute("SELECT last_metric_id FROM region_stats_watermark WHERE id = 1 FOR UPDATE")
+        watermark = cursor.fetchone()[0]
+
+        if full:
+            cursor.execute("DELETE FROM region_stats")
+            scope, params = "", {}
+        else:
+            if high_water <= watermark:
+                connection.commit()
+                return 0
+            cursor.execute(
+                "SELECT DISTINCT geo_loc_id FROM metrics_vals WHERE id > %s AND id <= %s",
+                (watermark, high_water),
+            )
+            geo_loc_ids = [row[0] for row in cursor.fetchall()]
+            scope = "AND gl.id = ANY(%(geo_loc_ids)s)"
+            params = {'geo_loc_ids': geo_loc_ids}
+
+        cursor.execute(UPSERT_STATS_SQL.format(scope=scope), params)
+        refreshed = cursor.rowcount
+        cursor.execute(
+            "UPDATE region_stats_watermark SET last_metric_id = %s WHERE id = 1",
+            (high_water,),
+        )
+    connection.commit()
+    return refreshed
+
@@ -0,0 +1,127 @@
+"""
+Compact description of the analytics schema for the SQL agent's prompt.
+
+With the tables, column types, collected metric names and region names
+already in its system prompt, the agent can write its query straight away
+instead of spending turns on ``sql_db_list_tables`` / ``sql_db_schema``.
+The text is stored on disk next to a fingerprint of the schema, the metric
+names and the region list, and rebuilt only when that fingerprint changes.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+from .db_pool import get_connection
+from .listings import NUMERIC_METRICS
+
+# === ENV CONFIG ===
+SCHEMA_PROMPT_PATH = os.getenv("REP_SCHEMA_PROMPT_PATH") or os.path.join(
+    os.getenv("REP_CACHE_DIR") or tempfile.gettempdir(), "rep_schema_prompt.json"
+)
+
+SCHEMA_TABLES = ('listings', 'geo_location')
+
+# Longer region lists are cut to keep the prompt small
+MAX_PROMPT_REGIONS = 100
+
+COLUMN_NOTES = {
+    ('listings', 'geo_loc_id'): "-> geo_location.id",
+    ('listings', 'monthly_price'): "rent in CZK per month",
+    ('listings', 'usable_area_m2'): "usable area in m2",
+    ('listings', 'price_per_m2'): "monthly_price / usable_area_m2",
+}
+
+COLUMNS_SQL = """
+SELECT table_name, column_name, data_type
+FROM information_schema.columns
+WHERE table_schema = current_schema() AND table_name = ANY(%s)
+ORDER BY table_name, ordinal_position
+"""
+
+# Changes whenever a region is added, renamed or removed
+REGIONS_FINGERPRINT_SQL = "SELECT COUNT(*), COALESCE(MAX(id), 0), md5(string_agg(region_name, ',' ORDER BY id)) FROM geo_location"
+
+METRICS_SQL = "SELECT DISTINCT metric FROM metrics_vals ORDER BY metric"
+
+
+def schema_fingerprint(cursor):
+    cursor.execute(COLUMNS_SQL, (list(SCHEMA_TABLES),))
+    columns = cursor.fetchall()
+    cursor.execute(REGIONS_FINGERPRINT_SQL)
+    regions = cursor.fetchone()
+    # The prompt lists the collected metric names, so a new metric rebuilds it
+    cursor.execute(METRICS_SQL)
+    metrics = [row[0] for row in cursor.fetchall()]
+    return hashlib.md5(json.dumps([columns, regions, metrics], default=str).encode("utf-8")).hexdigest()
+
+
+def build_schema_prompt(cursor):
+    """Render the schema, metric names and regions as a few lines of text."""
+    cursor.execute(COLUMNS_SQL, (list(SCHEMA_TABLES),))
+    tables = {}
+    for table, column, data_type in cursor.fetchall():
+        note = COLUMN_NOTES.get((table, column))
+        tables.setdefault(table, []).append(f"{column} {data_type}" + (f" ({note})" if note else ""))
+
+    cursor.execute(METRICS_SQL)
+    other_metrics = [row[0] for row in cursor.fetchall() if row[0] not in NUMERIC_METRICS]
+
+    cursor.execute("SELECT DISTINCT region_name FROM geo_location WHERE region_name IS NOT NULL ORDER BY region_name")
+    regions = [row[0] for row in cursor.fetchall()]
+
+    lines = ["PostgreSQL schema (current; query it directly, no need to list tables or fetch the schema):"]
+    lines += [f"- {table}({', '.join(columns)})" for table, columns in tables.items()]
+    lines.append("- listings has one row per property; the numeric metrics are its columns: " + ", ".join(NUMERIC_METRICS))
+    if other_metrics:
+        lines.append("- Other collected metrics, not queryable here: " + ", ".join(other_metrics))
+    shown = ", ".join(regions[:MAX_PROMPT_REGIONS])
+    if len(regions) > MAX_PROMPT_REGIONS:
+        shown += f", ... ({len(regions)} regions in total)"
+    lines.append(f"- geo_location.region_name values: {shown}")
+    return "\n".join(lines)
+
+
+def _read_cached(fingerprint):
+    try:
+        with open(SCHEMA_PROMPT_PATH, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get('fingerprint') == fingerprint:
+            return cached['prompt']
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+
+def _write_cached(fingerprint, prompt):
+    directory = os.path.dirname(SCHEMA_PROMPT_PATH) or "."
+    try:
+        os.makedirs(directory, exist_ok=True)
+        # Write then rename, so concurrent workers never read a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({'fingerprint': fingerprint, 'prompt': prompt}, f, ensure_ascii=False)
+        os.replace(tmp_path, SCHEMA_PROMPT_PATH)
+    except OSError as e:
+        print(f"Schema prompt cache write error: {e}")
+
+
+def get_schema_prompt():
+    """Schema description for the agent prompt, or None if the database is unreachable."""
+    connection = get_connection()
+    if not connection:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            fingerprint = schema_fingerprint(cursor)
+            prompt = _read_cached(fingerprint)
+            if prompt is None:
+                prompt = build_schema_prompt(cursor)
+                _write_cached(fingerprint, prompt)
+        connection.commit()
+        return prompt
+    except Exception as e:
+        print(f"Error building schema prompt: {e}")
+        return None
+    finally:
+        connection.close()
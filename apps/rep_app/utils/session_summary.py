@@ -0,0 +1,52 @@
+"""
+Session labels for the chat sidebar, generated in the background.
+
+The label comes from one short, direct LLM call (no routing agent, no SQL
+tools) scheduled on the task queue after the first answer is sent.
+"""
+from ..models import ChatSession
+from .langchain_bot import get_llm
+from .metrics import metrics_handler, stage
+from .tasks import enqueue
+
+DEFAULT_SUMMARY = "New conversation"
+SUMMARY_MAX_TOKENS = 40
+
+
+def needs_summary(session):
+    return not session.summary or session.summary.strip() == DEFAULT_SUMMARY
+
+
+def fallback_summary(message):
+    return message[:50] + ('...' if len(message) > 50 else '')
+
+
+def generate_session_summary(session_id, message, response):
+    """Ask the LLM for a one-sentence label and store it on the session."""
+    session = ChatSession.objects.filter(id=session_id).first()
+    if session is None or not needs_summary(session):
+        return
+
+    llm = get_llm()
+    if llm is None:
+        raise RuntimeError("LLM not available")
+    summary_prompt = (
+        "Summarize the following chat in one sentence for use as a session label:\n\n"
+        f"User: {message}\nAssistant: {response}"
+    )
+    with stage('summary.session_label'):
+        summary_result = llm.bind(max_tokens=SUMMARY_MAX_TOKENS).invoke(
+            summary_prompt, config={"callbacks": [metrics_handler()]}
+        ).content.strip()
+    ChatSession.objects.filter(id=session_id).update(summary=summary_result[:200] or message[:50])
+
+
+def schedule_session_summary(session, message, response):
+    """Label the session in the background (if its summary is default or empty)."""
+    if not needs_summary(session):
+        return None
+
+    def use_fallback(error):
+        ChatSession.objects.filter(id=session.id).update(summary=fallback_summary(message))
+
+    return enqueue(generate_session_summary, session.id, message, response, on_failure=use_fallback)
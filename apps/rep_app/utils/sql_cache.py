@@ -0,0 +1,109 @@
+"""
+Memoizing ``SQLDatabase`` for the LangChain SQL agent.
+
+The agent lists tables, reads their schema and often re-issues the same
+query, within one run and across conversations. ``CachingSQLDatabase``
+keeps table names and table info for the process lifetime and caches
+read-only query results keyed by the normalized SQL and the ``listings``
+sync watermark, so a result is never served once the tables the agent
+queries have changed. At most
+``REP_SQL_CACHE_SIZE`` results are kept; the least recently used go first.
+Queries written by the agent run through ``sql_guard.guarded_query()``.
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from langchain_community.utilities import SQLDatabase
+
+from .data_version import fetch_listings_version
+from .metrics import incr, stage
+from .sql_guard import guarded_query
+
+# === ENV CONFIG ===
+SQL_CACHE_SIZE = int(os.getenv("REP_SQL_CACHE_SIZE", "256"))
+
+# Quoted literals and identifiers are kept verbatim by normalize_sql()
+_QUOTED_RE = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""")
+
+
+def normalize_sql(sql):
+    """Lowercase and collapse whitespace outside quotes; drop trailing semicolons."""
+    parts = _QUOTED_RE.split(sql.strip().rstrip(";").strip())
+    return "".join(
+        part if i % 2 else re.sub(r"\s+", " ", part).lower()
+        for i, part in enumerate(parts)
+    ).strip()
+
+
+class CachingSQLDatabase(SQLDatabase):
+    """SQLDatabase with memoized schema calls and a bounded query-result cache."""
+
+    def __init__(self, *args, cache_size=SQL_CACHE_SIZE, **kwargs):
+        # Set up first: the base constructor already calls the overridden methods
+        self._cache_size = cache_size
+        self._results = OrderedDict()
+        self._table_info = {}
+        self._table_names = None
+        self._cache_lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0}
+        super().__init__(*args, **kwargs)
+
+    def get_usable_table_names(self):
+        if self._table_names is None:
+            self._table_names = list(super().get_usable_table_names())
+        return self._table_names
+
+    def get_table_info(self, table_names=None, get_col_comments=False):
+        key = (tuple(sorted(table_names)) if table_names else None, get_col_comments)
+        if key not in self._table_info:
+            self._table_info[key] = super().get_table_info(table_names, get_col_comments)
+        return self._table_info[key]
+
+    def run(self, command, fetch="all", include_columns=False, *, parameters=None, execution_options=None):
+        # Internal (parameterized or SQLAlchemy) statements run as usual
+        if not isinstance(command, str) or parameters or execution_options or fetch == "cursor":
+            with stage('sql.query', sql=command):
+                return super().run(command, fetch, include_columns,
+                                   parameters=parameters, execution_options=execution_options)
+
+        # Text queries come from the agent: guarded, then memoized
+        data_version = fetch_listings_version()
+        if data_version is None:
+            with stage('sql.query', sql=command):
+                return self._run_guarded(command, fetch, include_columns)
+
+        key = (normalize_sql(command), fetch, include_columns, data_version)
+        with self._cache_lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self._stats['hits'] += 1
+                incr('sql_cache.hits')
+                return self._results[key]
+            self._stats['misses'] += 1
+        incr('sql_cache.misses')
+
+        with stage('sql.query', sql=command):
+            result = self._run_guarded(command, fetch, include_columns)
+        with self._cache_lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self._cache_size:
+                self._results.popitem(last=False)
+        return result
+
+    def _run_guarded(self, command, fetch, include_columns):
+        return guarded_query(self._engine, command, fetch, include_columns,
+                             max_string_length=self._max_string_length)
+
+    def clear_cache(self):
+        """Forget cached results and schema, e.g. after a schema change."""
+        with self._cache_lock:
+            self._results.clear()
+        self._table_info.clear()
+        self._table_names = None
+
+    def cache_stats(self):
+        with self._cache_lock:
+            return {**self._stats, 'entries': len(self._results), 'max_entries': self._cache_size}
@@ -0,0 +1,125 @@
+"""
+Cost and runtime limits for SQL written by the agent.
+
+``guarded_query()`` runs one agent query in a read-only transaction with a
+``statement_timeout`` of ``REP_SQL_STATEMENT_TIMEOUT_MS``. Queries whose
+EXPLAIN cost is above ``REP_SQL_MAX_COST`` are refused before they run.
+At most ``REP_SQL_MAX_ROWS`` rows are fetched, and the text handed back to
+the LLM is kept within ``REP_SQL_MAX_RESULT_CHARS``. A truncated result
+says so, so the model aggregates instead of reading raw rows. Rejections
+raise ``QueryRejected``, an ``SQLAlchemyError``, so the SQL tool reports
+them to the agent as an error it can fix.
+"""
+import os
+import re
+
+from langchain_community.utilities.sql_database import truncate_word
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from .metrics import incr, stage
+
+# === ENV CONFIG ===
+SQL_STATEMENT_TIMEOUT_MS = int(os.getenv("REP_SQL_STATEMENT_TIMEOUT_MS", "5000"))
+SQL_MAX_ROWS = int(os.getenv("REP_SQL_MAX_ROWS", "100"))
+SQL_MAX_RESULT_CHARS = int(os.getenv("REP_SQL_MAX_RESULT_CHARS", "4000"))
+SQL_MAX_COST = float(os.getenv("REP_SQL_MAX_COST", "1000000"))
+
+_QUOTED_RE = re.compile(r"""(?:'(?:[^']|'')*'|"(?:[^"]|"")*")""")
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_READ_ONLY_RE = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+# Also enforced by the read-only transaction; checked first for a clearer error
+_WRITE_RE = re.compile(
+    r"\b(insert|update|delete|merge|drop|alter|create|truncate|grant|revoke|copy|vacuum|"
+    r"call|lock|pg_sleep|pg_terminate_backend|pg_cancel_backend|set_config)\b",
+    re.IGNORECASE,
+)
+
+
+class QueryRejected(SQLAlchemyError):
+    """The query is not allowed or would be too expensive to run."""
+
+
+def check_read_only(sql):
+    """Raise QueryRejected unless ``sql`` is a single SELECT (or WITH ... SELECT)."""
+    code = _COMMENT_RE.sub(" ", _QUOTED_RE.sub("''", sql)).strip().rstrip(";")
+    if not _READ_ONLY_RE.match(code):
+        raise QueryRejected("Only SELECT queries are allowed.")
+    if ";" in code:
+        raise QueryRejected("Run one statement at a time.")
+    if _WRITE_RE.search(code):
+        raise QueryRejected("The query may only read data.")
+
+
+def limit_sql(sql, limit):
+    """Cap the rows ``sql`` can return without changing its meaning."""
+    return f"SELECT * FROM (\n{sql.strip().rstrip(';')}\n) AS guarded_query LIMIT {int(limit)}"
+
+
+def explain_cost(connection, sql):
+    """Planner's total cost estimate for ``sql``."""
+    plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql.strip().rstrip(';')}")).scalar()
+    return plan[0]['Plan']['Total Cost']
+
+
+def format_result(rows, max_rows=SQL_MAX_ROWS, max_chars=SQL_MAX_RESULT_CHARS, more_rows=False):
+    """
+    ``str(rows)`` as SQLDatabase.run() returns it, within the size budget.
+
+    When rows are dropped (or ``more_rows`` says the query had more), a note
+    tells the model how much it sees and to aggregate in SQL instead.
+    """
+    shown = rows[:max_rows]
+    result = str(shown)
+    while len(result) > max_chars and len(shown) > 1:
+        shown = shown[:max(1, len(shown) * max_chars // len(result))]
+        result = str(shown)
+    if len(shown) == len(rows) and not more_rows:
+        return result if rows else ""
+
+    incr('sql_guard.truncated')
+    total = f"more than {len(rows)}" if more_rows else str(len(rows))
+    return (
+        f"{result[:max_chars]}\n(Result truncated: showing {len(shown)} of {total} rows. "
+        "Use aggregates, filters or LIMIT instead of reading raw rows.)"
+    )
+
+
+def guarded_query(engine, sql, fetch="all", include_columns=False, max_string_length=300):
+    """Run agent-written ``sql`` within the limits; returns the result as text."""
+    try:
+        check_read_only(sql)
+    except QueryRejected:
+        incr('sql_guard.rejected')
+        raise
+
+    row_limit = 1 if fetch == "one" else SQL_MAX_ROWS
+    with engine.begin() as connection:
+        if engine.dialect.name == "postgresql":
+            connection.execute(text("SET TRANSACTION READ ONLY"))
+            connection.execute(text(f"SET LOCAL statement_timeout = {SQL_STATEMENT_TIMEOUT_MS}"))
+            with stage('sql.explain'):
+                cost = explain_cost(connection, sql)
+            if cost > SQL_MAX_COST:
+                incr('sql_guard.rejected')
+                raise QueryRejected(
+                    f"Query rejected: estimated cost {cost:,.0f} is above the limit of {SQL_MAX_COST:,.0f}. "
+                    "Filter by region, avoid self-joins and aggregate in SQL."
+                )
+        # One extra row tells whether the query had more
+        try:
+            result = connection.execute(text(limit_sql(sql, row_limit + 1)))
+        except SQLAlchemyError as e:
+            if "statement timeout" in str(e):
+                incr('sql_guard.timeouts')
+            raise
+        rows = [row._asdict() for row in result.fetchall()]
+
+    rows = [
+        {column: truncate_word(value, length=max_string_length) for column, value in row.items()}
+        for row in rows
+    ]
+    if not include_columns:
+        rows = [tuple(row.values()) for row in rows]
+    more_rows = len(rows) > row_limit
+    return format_result(rows[:row_limit], max_rows=row_limit, more_rows=more_rows and fetch != "one")
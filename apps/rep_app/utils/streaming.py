@@ -0,0 +1,101 @@
+"""
+Streaming of agent output to the browser.
+
+``AgentStreamHandler`` is a LangChain callback handler that turns a running
+agent into a queue of events: every tool the agents decide to use (``step``)
+and the tokens of the final answer (``token``). The chat view
+drains the queue and sends each event as a Server-Sent Event.
+``AsyncAgentStreamHandler`` does the same for agents awaited on an event loop.
+"""
+import asyncio
+import json
+import queue
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from .langchain_bot import ANSWER_TAG
+
+FINAL_ANSWER_PREFIX = "Final Answer:"
+
+# Marks the end of the event stream
+_DONE = object()
+
+
+class AgentStreamHandler(BaseCallbackHandler):
+    """Collects streamed tokens and intermediate agent steps on a queue."""
+
+    def __init__(self):
+        self.events = queue.Queue()
+        self._buffers = {}
+        self._answer_runs = set()
+
+    def on_llm_new_token(self, token, *, run_id, tags=None, **kwargs):
+        # Runs the router sent straight to the answering model stream as-is
+        if run_id in self._answer_runs or ANSWER_TAG in (tags or []):
+            self._emit_token(token)
+            return
+
+        # The ReAct router reasons first; only its final answer is user-facing
+        text = self._buffers.get(run_id, "") + token
+        self._buffers[run_id] = text
+        if FINAL_ANSWER_PREFIX in text:
+            self._answer_runs.add(run_id)
+            self._emit_token(text.split(FINAL_ANSWER_PREFIX, 1)[1].lstrip())
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._buffers.pop(run_id, None)
+        self._answer_runs.discard(run_id)
+
+    def on_agent_action(self, action, **kwargs):
+        self._put({
+            'type': 'step',
+            'tool': action.tool,
+            'input': str(action.tool_input),
+        })
+
+    def _emit_token(self, token):
+        if token:
+            self._put({'type': 'token', 'text': token})
+
+    def _put(self, event):
+        self.events.put(event)
+
+    def close(self):
+        """Signal that the agent run is over."""
+        self._put(_DONE)
+
+    def __iter__(self):
+        """Yield events until close() is called."""
+        while True:
+            event = self.events.get()
+            if event is _DONE:
+                return
+            yield event
+
+
+class AsyncAgentStreamHandler(AgentStreamHandler):
+    """AgentStreamHandler drained with ``async for``; create it on the event loop."""
+
+    # Call the handler directly instead of in an executor, so tokens stay in order
+    run_inline = True
+
+    def __init__(self):
+        super().__init__()
+        self.events = asyncio.Queue()
+        self._loop = asyncio.get_running_loop()
+
+    def _put(self, event):
+        # Sync tools run in executor threads and report from there
+        self._loop.call_soon_threadsafe(self.events.put_nowait, event)
+
+    async def __aiter__(self):
+        while True:
+            event = await self.events.get()
+            if event is _DONE:
+                return
+            yield event
+
+
+def sse_event(payload):
+    """Format a dict as one Server-Sent Events message."""
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
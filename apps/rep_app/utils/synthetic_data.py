@@ -0,0 +1,103 @@
+"""
+Synthetic ``geo_location`` / ``metrics_vals`` data for benchmarks.
+
+Rows are streamed into PostgreSQL with COPY in chunks, so tens of millions
+of metric rows can be generated without holding them in memory. The same
+seed always produces the same data.
+"""
+import io
+import random
+
+from .analytics_schema import ensure_analytics_schema
+
+CREATE_BASE_TABLES_SQL = """
+CREATE TABLE IF NOT EXISTS geo_location (
+    id SERIAL PRIMARY KEY,
+    region_name TEXT,
+    country TEXT
+);
+CREATE TABLE IF NOT EXISTS metrics_vals (
+    id BIGSERIAL PRIMARY KEY,
+    url TEXT,
+    geo_loc_id INTEGER REFERENCES geo_location (id),
+    metric TEXT,
+    value TEXT
+);
+"""
+
+RESET_SQL = """
+TRUNCATE metrics_vals, geo_location, listings, region_stats RESTART IDENTITY CASCADE;
+UPDATE listings_watermark SET last_metric_id = 0;
+UPDATE region_stats_watermark SET last_metric_id = 0;
+"""
+
+CITIES = ['Brno', 'Ostrava', 'Plzeň', 'Liberec', 'Olomouc', 'České Budějovice', 'Hradec Králové']
+DISPOSITIONS = ['1+kk', '1+1', '2+kk', '2+1', '3+kk', '3+1', '4+kk']
+
+CHUNK_SIZE = 50_000
+
+
+def region_names(count):
+    """Praha districts first, then other cities, as many as requested."""
+    names = [f"Praha {n}" for n in range(1, 23)] + CITIES
+    if count > len(names):
+        names += [f"Region {n}" for n in range(len(names) + 1, count + 1)]
+    return names[:count]
+
+
+def table_has_rows(cursor, table):
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+    if not cursor.fetchone()[0]:
+        return False
+    cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {table})")
+    return cursor.fetchone()[0]
+
+
+def generate_synthetic_listings(connection, listings, regions=22, reset=False, seed=42):
+    """
+    Append ``listings`` synthetic listings spread over ``regions`` regions.
+
+    Each listing gets a monthly price, a usable area and a text disposition,
+    i.e. three ``metrics_vals`` rows. With ``reset`` the source and derived
+    tables are emptied first. Returns the number of metric rows written.
+    """
+    rng = random.Random(seed)
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_BASE_TABLES_SQL)
+    connection.commit()
+    ensure_analytics_schema(connection)
+
+    with connection.cursor() as cursor:
+        if reset:
+            cursor.execute(RESET_SQL)
+
+        geo_loc_ids = []
+        for name in region_names(regions):
+            cursor.execute(
+                "INSERT INTO geo_location (region_name, country) VALUES (%s, 'cz') RETURNING id",
+                (name,),
+            )
+            geo_loc_ids.append(cursor.fetchone()[0])
+
+        # Central districts are pricier, so the charts have some shape
+        price_levels = {geo_id: rng.uniform(14_000, 45_000) for geo_id in geo_loc_ids}
+
+        written = 0
+        for start in range(0, listings, CHUNK_SIZE):
+            buffer = io.StringIO()
+            for n in range(start, min(start + CHUNK_SIZE, listings)):
+                geo_id = rng.choice(geo_loc_ids)
+                url = f"https://synthetic.rep/{seed}/{geo_id}/{n}"
+                area = rng.randint(18, 160)
+                price = int(price_levels[geo_id] * (area / 55) ** 0.8 * rng.uniform(0.8, 1.25))
+                buffer.write(f"{url}\t{geo_id}\tmonthly_price\t{price}\n")
+                buffer.write(f"{url}\t{geo_id}\tusable_area_m2\t{area}\n")
+                buffer.write(f"{url}\t{geo_id}\tdisposition\t{rng.choice(DISPOSITIONS)}\n")
+                written += 3
+            buffer.seek(0)
+            cursor.copy_expert(
+                "COPY metrics_vals (url, geo_loc_id, metric, value) FROM STDIN",
+                buffer,
+            )
+    connection.commit()
+    return written
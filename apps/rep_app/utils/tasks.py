@@ -0,0 +1,54 @@
+"""
+Small in-process background task queue.
+
+Work that the user should not wait for (e.g. labelling a chat session) is
+handed to a shared thread pool with ``enqueue()``. Failed tasks are retried
+with exponential backoff; when the last attempt fails ``on_failure`` is
+called with the exception. Tasks live in memory only, so anything queued is
+lost if the process exits.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+
+# === ENV CONFIG ===
+TASK_WORKERS = int(os.getenv("REP_TASK_WORKERS", "2"))
+TASK_RETRIES = int(os.getenv("REP_TASK_RETRIES", "2"))
+TASK_RETRY_DELAY = float(os.getenv("REP_TASK_RETRY_DELAY", "1"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Process-wide worker pool, created on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=TASK_WORKERS, thread_name_prefix="rep-task")
+    return _executor
+
+
+def _run_with_retries(func, args, kwargs, retries, on_failure):
+    try:
+        for attempt in range(retries + 1):
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                print(f"Task {func.__name__} failed (attempt {attempt + 1}/{retries + 1}): {e}")
+                if attempt < retries:
+                    time.sleep(TASK_RETRY_DELAY * 2 ** attempt)
+                elif on_failure:
+                    on_failure(e)
+    finally:
+        # Worker threads outlive the task; don't leave their DB connections open
+        connections.close_all()
+
+
+def enqueue(func, *args, retries=TASK_RETRIES, on_failure=None, **kwargs):
+    """Run ``func(*args, **kwargs)`` on the worker pool; returns a Future."""
+    return get_executor().submit(_run_with_retries, func, args, kwargs, retries, on_failure)
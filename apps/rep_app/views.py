@@ -1,5 +1,5 @@
 # views.py
-from django.shortcuts import render, get_object_or_404
+from django.shortcuts import render, get_object_or_404, aget_object_or_404
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
@@ -7,23 +7,30 @@ from django.contrib.auth import authenticate, login
 from django.contrib import messages
 from django.shortcuts import redirect
 from django.contrib.auth.forms import AuthenticationForm
-from .models import ChatSession, ChatMessage
+from .models import ChatSession
+from asgiref.sync import sync_to_async
+import asyncio
+import hashlib
 import json
-from langchain.schema import HumanMessage
-from langchain_openai import ChatOpenAI
-from django.http import JsonResponse
-from django.views.decorators.http import require_http_methods
-import os
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import plotly.utils
-import psycopg2
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition, require_http_methods
 from psycopg2.extras import RealDictCursor
 
 # Import the SQL agent from langchain_bot
-from .utils.langchain_bot import get_agent_response, llm
+from .utils.langchain_bot import get_agent_response, get_agent_response_async, get_llm, sql_cache_stats
+from .utils.db_pool import get_connection, pool_stats
+from .utils.region_stats import SELECT_REGIONS_SQL, SELECT_STATS_SQL
+from .utils.data_version import fetch_stats_version
+from .utils.dashboard_cache import get_cached_dashboard, set_cached_dashboard
+from .utils.session_summary import needs_summary, schedule_session_summary
+from .utils.tasks import enqueue
+from .utils.conversation_memory import has_context, load_recent_messages, schedule_memory_update
+from .utils.pagination import before_cursor, encode_cursor
+from .utils.concurrency import CHAT_BATCH_CONCURRENCY, CHAT_BATCH_MAX_QUESTIONS, Overloaded, chat_limiter, chat_single_flight
+from .utils.answer_cache import answer_cache_stats, normalize_question
+from .utils.metrics import chat_trace, incr, metrics_handler, metrics_snapshot, stage
 
 def get_llm_response(prompt):
     """Get response from the SQL agent with fallback"""
@@ -33,268 +40,113 @@ def get_llm_response(prompt):
     except Exception as e:
         print(f"SQL Agent error: {e}")
         # Fallback to simple LLM if SQL agent fails
+        incr('fallback.used')
         try:
-            fallback_response = llm([HumanMessage(content=prompt)]).content
+            from langchain_core.messages import HumanMessage
+
+            with chat_trace('fallback'), stage('fallback.llm'):
+                fallback_response = get_llm().invoke(
+                    [HumanMessage(content=prompt)], config={"callbacks": [metrics_handler()]}
+                ).content
             return fallback_response
         except Exception as fallback_error:
             print(f"Fallback LLM error: {fallback_error}")
             return f"I'm having trouble connecting to my services right now. Please try again later. (Error: {str(e)})"
 
 def get_database_connection():
-    """Get PostgreSQL database connection"""
+    """Borrow a PostgreSQL connection from the shared pool; close() returns it"""
+    return get_connection()
+
+def fetch_region_stats(region=None):
+    """Read region_stats rows, optionally for a single region"""
+    connection = get_database_connection()
+    if not connection:
+        return None
     try:
-        connection = psycopg2.connect(
-            host=os.getenv("POSTGRES_HOST", "localhost"),
-            port=os.getenv("POSTGRES_PORT", "4321"),
-            database=os.getenv("POSTGRES_DB", "rep_db"),
-            user=os.getenv("POSTGRES_USER", "vanhieuvu"),
-            password=os.getenv("POSTGRES_PASSWORD", "nanuk§2")
-        )
-        return connection
+        with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            # The region predicate runs in the database
+            if region:
+                cursor.execute(SELECT_STATS_SQL + " WHERE region_name = %s", (region,))
+            else:
+                cursor.execute(SELECT_STATS_SQL)
+            return cursor.fetchall()
     except Exception as e:
-        print(f"Database connection error: {e}")
+        print(f"Error fetching dashboard data: {e}")
         return None
+    finally:
+        connection.close()
 
-def get_dashboard_data():
-    """Fetch data for dashboard visualizations"""
+def fetch_available_regions():
+    """Read the region names offered by the dashboard filter"""
     connection = get_database_connection()
     if not connection:
         return None
-    
     try:
-        # Query 1: Average monthly rent by region
-        query1 = """
-        SELECT 
-            gl.region_name,
-            AVG(CAST(mv.value AS DECIMAL)) as avg_monthly_rent,
-            COUNT(*) as property_count
-        FROM metrics_vals mv
-        JOIN geo_location gl ON mv.geo_loc_id = gl.id
-        WHERE mv.metric = 'monthly_price'
-        GROUP BY gl.region_name, gl.id
-        ORDER BY avg_monthly_rent DESC
-        """
-        
-        # Query 2: Property sizes by region
-        query2 = """
-        SELECT 
-            gl.region_name,
-            AVG(CAST(mv.value AS DECIMAL)) as avg_area_m2,
-            COUNT(*) as property_count
-        FROM metrics_vals mv
-        JOIN geo_location gl ON mv.geo_loc_id = gl.id
-        WHERE mv.metric = 'usable_area_m2'
-        GROUP BY gl.region_name, gl.id
-        ORDER BY avg_area_m2 DESC
-        """
-        
-        # Query 3: Price per square meter
-        query3 = """
-        SELECT 
-            gl.region_name,
-            AVG(CAST(price.value AS DECIMAL) / CAST(area.value AS DECIMAL)) as price_per_m2
-        FROM metrics_vals price
-        JOIN metrics_vals area ON price.url = area.url AND price.geo_loc_id = area.geo_loc_id
-        JOIN geo_location gl ON price.geo_loc_id = gl.id
-        WHERE price.metric = 'monthly_price' AND area.metric = 'usable_area_m2'
-        GROUP BY gl.region_name, gl.id
-        ORDER BY price_per_m2 DESC
-        """
-        
-        # Query 4: Total properties by region
-        query4 = """
-        SELECT 
-            gl.region_name,
-            COUNT(DISTINCT mv.url) as total_properties
-        FROM metrics_vals mv
-        JOIN geo_location gl ON mv.geo_loc_id = gl.id
-        WHERE mv.metric = 'monthly_price'
-        GROUP BY gl.region_name, gl.id
-        ORDER BY total_properties DESC
-        """
-        
-        with connection.cursor(cursor_factory=RealDictCursor) as cursor:
-            cursor.execute(query1)
-            rent_data = pd.DataFrame(cursor.fetchall())
-            
-            cursor.execute(query2)
-            area_data = pd.DataFrame(cursor.fetchall())
-            
-            cursor.execute(query3)
-            price_per_m2_data = pd.DataFrame(cursor.fetchall())
-            
-            cursor.execute(query4)
-            property_count_data = pd.DataFrame(cursor.fetchall())
-        
-        connection.close()
-        
-        return {
-            'rent_data': rent_data,
-            'area_data': area_data,
-            'price_per_m2_data': price_per_m2_data,
-            'property_count_data': property_count_data
-        }
-        
+        with connection.cursor() as cursor:
+            cursor.execute(SELECT_REGIONS_SQL)
+            return [row[0] for row in cursor.fetchall()]
     except Exception as e:
-        print(f"Error fetching dashboard data: {e}")
+        print(f"Error fetching dashboard regions: {e}")
+        return None
+    finally:
         connection.close()
+
+def get_dashboard_data(region=None):
+    """Fetch the compact dashboard payload, optionally for a single region"""
+    # region_stats is read as is; the write signal and refresh_region_stats keep it current
+    return build_dashboard_payload(fetch_region_stats(region), fetch_available_regions())
+
+async def get_dashboard_data_async(region=None):
+    """Fetch dashboard data with the independent queries running concurrently"""
+    # Each query borrows its own pooled connection in a separate thread
+    stats, available_regions = await asyncio.gather(
+        sync_to_async(fetch_region_stats, thread_sensitive=False)(region),
+        sync_to_async(fetch_available_regions, thread_sensitive=False)(),
+    )
+    return build_dashboard_payload(stats, available_regions)
+
+# chart name -> (value column, count column) in region_stats rows
+CHART_SERIES = {
+    'rent': ('avg_monthly_rent', 'rent_count'),
+    'area': ('avg_area_m2', 'area_count'),
+    'price_per_m2': ('price_per_m2', 'price_per_m2_count'),
+    'property_count': ('total_properties', 'total_properties'),
+}
+
+def chart_series(stats, value_key, count_key):
+    """Column arrays for one chart: regions with data, largest value first"""
+    selected = sorted(
+        (row for row in stats if row[count_key] > 0),
+        key=lambda row: row[value_key],
+        reverse=True
+    )
+    return {
+        'regions': [row['region_name'] for row in selected],
+        'values': [round(float(row[value_key]), 2) for row in selected]
+    }
+
+def build_dashboard_payload(stats, available_regions):
+    """JSON-ready dashboard payload from region_stats rows, or None if a query failed"""
+    if stats is None or available_regions is None:
         return None
 
-def create_dashboard_charts(data):
-    """Create Plotly charts for dashboard"""
-    if not data:
-        return {}
-    
-    charts = {}
-    
-    # Chart 1: Average Monthly Rent by Region
-    if not data['rent_data'].empty:
-        fig1 = px.bar(
-            data['rent_data'], 
-            x='region_name', 
-            y='avg_monthly_rent',
-            title='',
-            labels={'avg_monthly_rent': 'Average Monthly Rent (CZK)', 'region_name': 'Region'},
-            color='avg_monthly_rent',
-            color_continuous_scale='viridis',
-            text='avg_monthly_rent'
-        )
-        fig1.update_traces(
-            texttemplate='%{text:,.0f}',
-            textposition='outside',
-            marker_line_color='white',
-            marker_line_width=1
-        )
-        fig1.update_layout(
-            height=350,
-            margin=dict(l=60, r=40, t=20, b=80),
-            showlegend=False,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(size=12),
-            xaxis=dict(
-                showgrid=False,
-                tickangle=45,
-                tickfont=dict(size=11)
-            ),
-            yaxis=dict(
-                showgrid=True,
-                gridcolor='rgba(0,0,0,0.1)',
-                tickfont=dict(size=11)
-            ),
-            title_font_size=16,
-            title_font_color='#896F8C'
-        )
-        charts['rent_chart'] = plotly.utils.PlotlyJSONEncoder().encode(fig1)
-    
-    # Chart 2: Average Property Size by Region
-    if not data['area_data'].empty:
-        fig2 = px.bar(
-            data['area_data'], 
-            x='region_name', 
-            y='avg_area_m2',
-            title='',
-            labels={'avg_area_m2': 'Average Area (m²)', 'region_name': 'Region'},
-            color='avg_area_m2',
-            color_continuous_scale='plasma',
-            text='avg_area_m2'
-        )
-        fig2.update_traces(
-            texttemplate='%{text:.1f}',
-            textposition='outside',
-            marker_line_color='white',
-            marker_line_width=1
-        )
-        fig2.update_layout(
-            height=350,
-            margin=dict(l=60, r=40, t=20, b=80),
-            showlegend=False,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(size=12),
-            xaxis=dict(
-                showgrid=False,
-                tickangle=45,
-                tickfont=dict(size=11)
-            ),
-            yaxis=dict(
-                showgrid=True,
-                gridcolor='rgba(0,0,0,0.1)',
-                tickfont=dict(size=11)
-            ),
-            title_font_size=16,
-            title_font_color='#896F8C'
-        )
-        charts['area_chart'] = plotly.utils.PlotlyJSONEncoder().encode(fig2)
-    
-    # Chart 3: Price per Square Meter
-    if not data['price_per_m2_data'].empty:
-        fig3 = px.bar(
-            data['price_per_m2_data'], 
-            x='region_name', 
-            y='price_per_m2',
-            title='',
-            labels={'price_per_m2': 'Price per m² (CZK)', 'region_name': 'Region'},
-            color='price_per_m2',
-            color_continuous_scale='inferno',
-            text='price_per_m2'
-        )
-        fig3.update_traces(
-            texttemplate='%{text:,.0f}',
-            textposition='outside',
-            marker_line_color='white',
-            marker_line_width=1
-        )
-        fig3.update_layout(
-            height=350,
-            margin=dict(l=60, r=40, t=20, b=80),
-            showlegend=False,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(size=12),
-            xaxis=dict(
-                showgrid=False,
-                tickangle=45,
-                tickfont=dict(size=11)
-            ),
-            yaxis=dict(
-                showgrid=True,
-                gridcolor='rgba(0,0,0,0.1)',
-                tickfont=dict(size=11)
-            ),
-            title_font_size=16,
-            title_font_color='#896F8C'
-        )
-        charts['price_per_m2_chart'] = plotly.utils.PlotlyJSONEncoder().encode(fig3)
-    
-    # Chart 4: Property Distribution by Region
-    if not data['property_count_data'].empty:
-        fig4 = px.pie(
-            data['property_count_data'], 
-            values='total_properties', 
-            names='region_name',
-            title='',
-            hole=0.4
-        )
-        fig4.update_traces(
-            textposition='inside',
-            textinfo='percent+label',
-            textfont_size=12,
-            marker=dict(line=dict(color='white', width=2))
-        )
-        fig4.update_layout(
-            height=350,
-            margin=dict(l=20, r=20, t=20, b=20),
-            showlegend=False,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(size=11),
-            title_font_size=16,
-            title_font_color='#896F8C'
-        )
-        charts['property_count_chart'] = plotly.utils.PlotlyJSONEncoder().encode(fig4)
-    
-    return charts
+    kpis = {}
+    rented = [row for row in stats if row['rent_count'] > 0]
+    if rented:
+        rents = [float(row['avg_monthly_rent']) for row in rented]
+        kpis['total_properties'] = sum(row['rent_count'] for row in rented)
+        kpis['avg_rent'] = round(sum(rents) / len(rents))
+        kpis['max_rent'] = round(max(rents))
+        kpis['min_rent'] = round(min(rents))
+
+    return {
+        'available_regions': available_regions,
+        'kpis': kpis,
+        'charts': {
+            name: chart_series(stats, value_key, count_key)
+            for name, (value_key, count_key) in CHART_SERIES.items()
+        }
+    }
 
 # === PUBLIC PAGES ===
 def landing(request):
@@ -316,64 +168,70 @@ def login_page(request):
 
 # === MAIN APP PAGES ===
 @login_required
-def dashboard(request):
-    data = get_dashboard_data()
-    charts = create_dashboard_charts(data)
-    
-    # Get available regions for filters
-    available_regions = []
-    if data and not data['rent_data'].empty:
-        available_regions = data['rent_data']['region_name'].tolist()
-    
+async def dashboard(request):
     # Get selected filter from request
     selected_region = request.GET.get('region', '')
-    
-    # Apply filter if selected
-    if selected_region and selected_region != 'all':
-        filtered_data = filter_data_by_region(data, selected_region)
-        filtered_charts = create_dashboard_charts(filtered_data)
-        charts = filtered_charts
-        data = filtered_data
+    payload = await get_dashboard_payload_async(selected_region)
 
-    kpis = {}
-    if data and not data['rent_data'].empty:
-        kpis['total_properties'] = data['rent_data']['property_count'].sum()
-        kpis['avg_rent'] = round(data['rent_data']['avg_monthly_rent'].mean(), 0)
-        kpis['max_rent'] = round(data['rent_data']['avg_monthly_rent'].max(), 0)
-        kpis['min_rent'] = round(data['rent_data']['avg_monthly_rent'].min(), 0)
-
-    return render(request, 'rep_app/dashboard.html', {
-        'charts': charts,
-        'kpis': kpis,
-        'data_available': data is not None,
-        'available_regions': available_regions,
+    # Charts are drawn in the browser from dashboard_data; the page carries KPIs and filters.
+    # Rendering touches request.user lazily, which needs a sync context
+    return await sync_to_async(render)(request, 'rep_app/dashboard.html', {
+        'kpis': payload['kpis'] if payload else {},
+        'data_available': payload is not None,
+        'available_regions': payload['available_regions'] if payload else [],
         'selected_region': selected_region
     })
 
-def filter_data_by_region(data, region_name):
-    """Filter data by selected region"""
-    if not data:
-        return data
-    
-    filtered_data = {}
-    
-    # Filter rent data
-    if not data['rent_data'].empty:
-        filtered_data['rent_data'] = data['rent_data'][data['rent_data']['region_name'] == region_name]
-    
-    # Filter area data
-    if not data['area_data'].empty:
-        filtered_data['area_data'] = data['area_data'][data['area_data']['region_name'] == region_name]
-    
-    # Filter price per m2 data
-    if not data['price_per_m2_data'].empty:
-        filtered_data['price_per_m2_data'] = data['price_per_m2_data'][data['price_per_m2_data']['region_name'] == region_name]
-    
-    # Filter property count data
-    if not data['property_count_data'].empty:
-        filtered_data['property_count_data'] = data['property_count_data'][data['property_count_data']['region_name'] == region_name]
-    
-    return filtered_data
+def dashboard_data_etag(request):
+    """ETag for dashboard_data: changes with the data version and the region filter"""
+    request.dashboard_data_version = get_dashboard_data_version()
+    if request.dashboard_data_version is None:
+        return None
+    key = f"{request.dashboard_data_version}:{request.GET.get('region', '')}"
+    return hashlib.md5(key.encode('utf-8')).hexdigest()
+
+@login_required
+@gzip_page
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=dashboard_data_etag)
+def dashboard_data(request):
+    """Compact chart data (region names plus values) for client-side rendering"""
+    selected_region = request.GET.get('region', '')
+    payload = get_dashboard_payload(selected_region, request.dashboard_data_version)
+    if payload is None:
+        return JsonResponse({'error': 'Dashboard data is unavailable'}, status=503)
+    return JsonResponse(payload)
+
+def get_dashboard_data_version():
+    """Return the region_stats version, or None if the database is unreachable"""
+    return fetch_stats_version()
+
+def get_dashboard_payload(selected_region, data_version):
+    """Dashboard payload for the filter, served from the versioned cache when possible"""
+    if data_version is not None:
+        payload = get_cached_dashboard(selected_region, data_version)
+        if payload is not None:
+            return payload
+
+    region = selected_region if selected_region != 'all' else ''
+    payload = get_dashboard_data(region)
+    if payload is not None and data_version is not None:
+        set_cached_dashboard(selected_region, data_version, payload)
+    return payload
+
+async def get_dashboard_payload_async(selected_region):
+    """Async counterpart of get_dashboard_payload() that looks up the data version itself"""
+    data_version = await sync_to_async(get_dashboard_data_version, thread_sensitive=False)()
+    if data_version is not None:
+        payload = await sync_to_async(get_cached_dashboard)(selected_region, data_version)
+        if payload is not None:
+            return payload
+
+    region = selected_region if selected_region != 'all' else ''
+    payload = await get_dashboard_data_async(region)
+    if payload is not None and data_version is not None:
+        await sync_to_async(set_cached_dashboard)(selected_region, data_version, payload)
+    return payload
 
 @login_required
 def chatbot_view(request):
@@ -384,20 +242,58 @@ def chatbot_view(request):
     })
 
 # === CHATBOT ENDPOINTS ===
+# Async: while the LLM and agents are awaited the worker is free to serve
+# other requests (run under ASGI, see README).
 @csrf_exempt
 @login_required
-def start_session(request):
+async def start_session(request):
     if request.method == 'POST':
-        session = ChatSession.objects.create(user=request.user, summary="New conversation")
-        print("🧪 New session created:", session.id, "user:", request.user)
+        user = await request.auser()
+        session = await ChatSession.objects.acreate(user=user, summary="New conversation")
+        print("🧪 New session created:", session.id, "user:", user)
         return JsonResponse({
             'session_id': session.id,
             'summary': session.summary,
         })
 
+async def shared_answer(session, message, has_history, callbacks=None, recent_messages=None):
+    """
+    get_agent_response_async() under the global limit, shared between callers.
+
+    Identical questions in flight share one execution: across all users when
+    the session has no history yet, otherwise within the session. Only the
+    caller that starts an execution has its callbacks run, so callers with
+    callbacks (streaming) never join another caller's execution.
+    ``recent_messages`` pins the history the agent sees; ``has_history`` must
+    describe that same history.
+    """
+    question = normalize_question(message)
+    key = (session.id, question) if has_history else (None, question)
+
+    async def execute():
+        async with chat_limiter.global_slot():
+            return await get_agent_response_async(message, session, callbacks=callbacks,
+                                                  recent_messages=recent_messages)
+
+    return await chat_single_flight.run(key, execute, join=not callbacks)
+
+async def answer_question(user_id, session, message, callbacks=None):
+    """shared_answer() within the user's chat limit; raises Overloaded when there is no capacity"""
+    async with chat_limiter.user_slot(user_id):
+        has_history = await sync_to_async(has_context)(session)
+        return await shared_answer(session, message, has_history, callbacks)
+
+# Stored as the answer when a streaming client leaves before the answer is ready
+INTERRUPTED_ANSWER = "(No answer: the request was interrupted before it finished.)"
+
+def too_many_requests(error, **payload):
+    response = JsonResponse({**payload, 'retry_after': error.retry_after}, status=429)
+    response['Retry-After'] = str(error.retry_after)
+    return response
+
 @csrf_exempt
 @login_required
-def chat_api(request):
+async def chat_api(request):
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
@@ -407,29 +303,21 @@ def chat_api(request):
             if not message or not session_id:
                 return JsonResponse({'response': 'Missing message or session_id'}, status=400)
             
-            session = get_object_or_404(ChatSession, id=session_id, user=request.user)
-
-            # Save user message
-            ChatMessage.objects.create(session=session, is_user=True, content=message)
+            user = await request.auser()
+            session = await aget_object_or_404(ChatSession, id=session_id, user=user)
 
             # Get response from SQL agent (which will automatically choose the right tool)
-            response = get_agent_response(message, session)
-            ChatMessage.objects.create(session=session, is_user=False, content=response)
-
-            # Generate session summary (if it's default or empty)
-            if not session.summary or session.summary.strip() == "New conversation":
-                try:
-                    summary_prompt = (
-                        "Summarize the following chat in one sentence for use as a session label:\n\n"
-                        f"User: {message}\nAssistant: {response}"
-                    )
-                    summary_result = get_agent_response(summary_prompt).strip()
-                    session.summary = summary_result[:200] or message[:50]
-                except Exception as e:
-                    print(f"Summary generation error: {e}")
-                    session.summary = message[:50] + ('...' if len(message) > 50 else '')
-
-                session.save()
+            try:
+                response = await answer_question(user.id, session, message)
+            except Overloaded as e:
+                return too_many_requests(e, response='The assistant is busy. Please try again shortly.')
+
+            # Question and answer are stored together, in one transaction
+            await sync_to_async(session.save_turn)(message, response)
+
+            # Labelled in the background; the page polls get_session_summary
+            schedule_session_summary(session, message, response)
+            schedule_memory_update(session)
 
             return JsonResponse({
                 'response': response,
@@ -441,10 +329,181 @@ def chat_api(request):
             traceback.print_exc()
             return JsonResponse({'response': 'An error occurred. Please try again.'}, status=500)
 
+@csrf_exempt
+@login_required
+@require_http_methods(["POST"])
+async def chat_stream(request):
+    """Same as chat_api, but streams agent steps and answer tokens as Server-Sent Events"""
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'response': 'Invalid JSON body'}, status=400)
+    message = data.get('message')
+    session_id = data.get('session_id')
+
+    if not message or not session_id:
+        return JsonResponse({'response': 'Missing message or session_id'}, status=400)
+
+    user = await request.auser()
+    session = await aget_object_or_404(ChatSession, id=session_id, user=user)
+
+    # Refuse before the stream starts when the limits are already exhausted
+    try:
+        chat_limiter.check(user.id)
+    except Overloaded as e:
+        return too_many_requests(e, response='The assistant is busy. Please try again shortly.')
+
+    # Imported here so the chat page does not pay for LangChain at startup
+    from .utils.streaming import AsyncAgentStreamHandler, sse_event
+
+    async def event_stream():
+        handler = AsyncAgentStreamHandler()
+
+        async def run_agent():
+            try:
+                return await answer_question(user.id, session, message, callbacks=[handler])
+            except Overloaded:
+                raise
+            except Exception as e:
+                print(f"Streaming agent error: {e}")
+                return 'An error occurred. Please try again.'
+            finally:
+                handler.close()
+
+        agent_task = asyncio.create_task(run_agent())
+        finished = False
+        try:
+            async for event in handler:
+                yield sse_event(event)
+            response = await agent_task
+            finished = True
+        except Overloaded as e:
+            # Like chat_api's 429: nothing is stored and the client retries
+            finished = True
+            yield sse_event({'type': 'error', 'retry_after': e.retry_after,
+                             'response': 'The assistant is busy. Please try again shortly.'})
+            return
+        finally:
+            # Client went away: stop waiting (the run stops if nobody else shares it)
+            agent_task.cancel()
+            if not finished:
+                # Keep the question in the history; saved off the cancelled request
+                enqueue(session.save_turn, message, INTERRUPTED_ANSWER)
+
+        await sync_to_async(session.save_turn)(message, response)
+        schedule_session_summary(session, message, response)
+        schedule_memory_update(session)
+        yield sse_event({'type': 'done', 'response': response, 'summary': session.summary})
+
+    stream = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    stream['Cache-Control'] = 'no-cache'
+    stream['X-Accel-Buffering'] = 'no'  # keep nginx from buffering the stream
+    return stream
+
+@csrf_exempt
+@login_required
+async def chat_batch(request):
+    """
+    Answer a list of questions for one session in parallel, streamed as NDJSON.
+
+    Each line is an answer (or error) with the question's index, sent as soon
+    as it is ready; a final "done" line follows. Repeated questions are
+    answered once. Turns are stored in the order the questions were given.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'response': 'POST required'}, status=405)
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'response': 'Invalid JSON body'}, status=400)
+    questions = data.get('questions')
+    session_id = data.get('session_id')
+    if not session_id or not isinstance(questions, list) or not questions \
+            or not all(isinstance(q, str) and q.strip() for q in questions):
+        return JsonResponse({'response': 'Missing session_id or a non-empty list of questions'}, status=400)
+    if len(questions) > CHAT_BATCH_MAX_QUESTIONS:
+        return JsonResponse({'response': f'At most {CHAT_BATCH_MAX_QUESTIONS} questions per batch'}, status=400)
+
+    user = await request.auser()
+    session = await aget_object_or_404(ChatSession, id=session_id, user=user)
+    try:
+        chat_limiter.check(user.id)
+    except Overloaded as e:
+        return too_many_requests(e, response='The assistant is busy. Please try again shortly.')
+
+    async def answer_lines():
+        # The whole batch counts as one of the user's chats
+        async with chat_limiter.user_slot(user.id):
+            # Every question sees the history from before the batch, not the
+            # answered prefix stored while the batch runs
+            recent_messages = await sync_to_async(load_recent_messages)(session, None)
+            has_history = bool(recent_messages or session.memory_summary)
+            pool = asyncio.Semaphore(CHAT_BATCH_CONCURRENCY)
+
+            async def answer(message):
+                async with pool:
+                    return await shared_answer(session, message, has_history,
+                                               recent_messages=recent_messages)
+
+            # One task per distinct question; duplicates wait on the same task
+            tasks = {}
+            indexes = {}
+            for i, message in enumerate(questions):
+                question = normalize_question(message)
+                if question not in tasks:
+                    tasks[question] = asyncio.ensure_future(answer(message))
+                    indexes[tasks[question]] = []
+                indexes[tasks[question]].append(i)
+
+            results = [None] * len(questions)
+            saved = 0
+            pending = set(indexes)
+            try:
+                while pending:
+                    finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in finished:
+                        try:
+                            outcome = {'type': 'answer', 'response': task.result()}
+                        except Overloaded as e:
+                            outcome = {'type': 'error', 'retry_after': e.retry_after,
+                                       'response': 'The assistant is busy. Please try again shortly.'}
+                        except Exception as e:
+                            print(f"Batch question error: {e}")
+                            outcome = {'type': 'error', 'response': 'An error occurred. Please try again.'}
+                        for i in indexes[task]:
+                            results[i] = outcome
+                            yield {**outcome, 'index': i, 'question': questions[i]}
+
+                    # Store the answered prefix, so turns keep the order of the questions
+                    ready = saved
+                    while ready < len(results) and results[ready] is not None:
+                        ready += 1
+                    turns = [(questions[i], results[i]['response'])
+                             for i in range(saved, ready) if results[i]['type'] == 'answer']
+                    if turns:
+                        await sync_to_async(session.save_turns)(turns)
+                    saved = ready
+            finally:
+                # Client went away: drop the questions not answered yet
+                for task in indexes:
+                    task.cancel()
+
+        answered = [(q, r['response']) for q, r in zip(questions, results) if r['type'] == 'answer']
+        if answered:
+            schedule_session_summary(session, *answered[0])
+            schedule_memory_update(session)
+        yield {'type': 'done', 'answered': len(answered), 'failed': len(questions) - len(answered)}
+
+    async def stream():
+        async for line in answer_lines():
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+
+    return StreamingHttpResponse(stream(), content_type='application/x-ndjson')
+
 @login_required
 def get_session_summary(request, session_id):
     session = get_object_or_404(ChatSession, id=session_id, user=request.user)
-    return JsonResponse({'summary': session.summary or ''})
+    return JsonResponse({'summary': session.summary or '', 'pending': needs_summary(session)})
 
 @require_http_methods(["DELETE"])
 @login_required
@@ -456,16 +515,59 @@ def delete_session(request, session_id):
     except ChatSession.DoesNotExist:
         return JsonResponse({"error": "Session not found"}, status=404)
     
+# Messages per history page; ?limit= may ask for fewer or up to the maximum
+MESSAGE_PAGE_SIZE = 50
+MAX_MESSAGE_PAGE_SIZE = 200
+
 @login_required
-def session_messages(request, session_id):
+def chat_metrics(request):
+    """Chat pipeline latencies, token counts, caches, pool and limiter state (staff only)"""
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+    return JsonResponse({
+        **metrics_snapshot(),
+        'answer_cache': answer_cache_stats(),
+        'sql_cache': sql_cache_stats(),
+        'db_pool': pool_stats(),
+        'limiter': chat_limiter.stats(),
+        'single_flight': chat_single_flight.stats(),
+    })
+
+def serialize_message(m):
+    return {'id': m.id, 'is_user': m.is_user, 'content': m.content, 'timestamp': m.timestamp.isoformat()}
+
+@login_required
+async def session_messages(request, session_id):
+    """
+    One page of a session's history, newest page first (?before=<cursor>&limit=N).
+
+    With ?format=ndjson the whole history is streamed instead, one message per line.
+    """
     try:
-        session = get_object_or_404(ChatSession, id=session_id, user=request.user)
-        messages = session.messages.order_by('timestamp')
-        data = [
-            {'is_user': m.is_user, 'content': m.content}
-            for m in messages
-        ]
-        return JsonResponse(data, safe=False)
+        session = await aget_object_or_404(ChatSession, id=session_id, user=await request.auser())
+        messages = session.messages.all()
+
+        if request.GET.get('format') == 'ndjson':
+            async def stream():
+                async for m in messages.order_by('timestamp', 'id').aiterator(chunk_size=MESSAGE_PAGE_SIZE):
+                    yield json.dumps(serialize_message(m), ensure_ascii=False) + "\n"
+            return StreamingHttpResponse(stream(), content_type='application/x-ndjson')
+
+        try:
+            limit = min(max(int(request.GET.get('limit', MESSAGE_PAGE_SIZE)), 1), MAX_MESSAGE_PAGE_SIZE)
+            if request.GET.get('before'):
+                messages = messages.filter(before_cursor(request.GET['before']))
+        except ValueError:
+            return JsonResponse({'error': 'Invalid limit or cursor'}, status=400)
+
+        # One extra row tells whether an older page exists
+        page = [m async for m in messages.order_by('-timestamp', '-id')[:limit + 1]]
+        has_more = len(page) > limit
+        page = page[:limit][::-1]
+        return JsonResponse({
+            'messages': [serialize_message(m) for m in page],
+            'next_cursor': encode_cursor(page[0].timestamp, page[0].id) if has_more else None,
+        })
     except Exception as e:
         print(f"Error loading session messages: {e}")
-        return JsonResponse([], safe=False)
\ No newline at end of file
+        return JsonResponse({'messages': [], 'next_cursor': None})
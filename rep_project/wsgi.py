@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rep_project.settings')
 
 application = get_wsgi_application()
+
+# Optionally build the LLM, SQL database and agents before the first request
+if os.getenv('REP_WARM_UP') == '1':
+    from apps.rep_app.utils.langchain_bot import warm_up
+
+    warm_up()